@@ -2,12 +2,13 @@
 
 from __future__ import annotations
 
-import re
 import sys
 from pathlib import Path
 
-USES_PATTERN = re.compile(r"^\s*uses:\s*([^\s#]+)")
-SHA_PATTERN = re.compile(r"^[0-9a-f]{40}$")
+# Run by path from a checkout (CI does), so the package may not be installed.
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from mwpack import pinning  # noqa: E402
 
 
 def main() -> int:
@@ -16,26 +17,9 @@ def main() -> int:
         print(".github/workflows not found")
         return 1
 
-    failures: list[str] = []
-
-    for workflow in sorted(workflow_dir.glob("*.yml")):
-        lines = workflow.read_text(encoding="utf-8").splitlines()
-        for idx, line in enumerate(lines, start=1):
-            match = USES_PATTERN.match(line)
-            if not match:
-                continue
-
-            target = match.group(1)
-            if target.startswith("./") or target.startswith("docker://"):
-                continue
-
-            if "@" not in target:
-                failures.append(f"{workflow}:{idx}: missing @ref in uses: {target}")
-                continue
-
-            ref = target.rsplit("@", 1)[1]
-            if not SHA_PATTERN.fullmatch(ref):
-                failures.append(f"{workflow}:{idx}: not pinned to full SHA: {target}")
+    report = pinning.scan_repos([Path(".")], workers=1)["repos"][0]
+    failures = [pinning.describe(finding) for finding in report["findings"]]
+    failures.extend(f"{error['file']}: unreadable: {error['error']}" for error in report["errors"])
 
     if failures:
         print("Action pinning check failed")
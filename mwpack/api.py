@@ -0,0 +1,200 @@
+"""In-process Python API with session-scoped caches."""
+
+from __future__ import annotations
+
+import copy
+import json
+from collections.abc import Iterable
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from . import build, diff, generations, model, package, schema
+
+
+@dataclass(frozen=True)
+class SolveResult:
+    nodes: int
+    gpus: int
+    p_total_w: float
+    feasible: bool
+    status: str
+    report: dict[str, Any]
+
+
+@dataclass(frozen=True)
+class BuildResult:
+    out_dir: Path
+    memo: Path
+    report: Path
+    summary_path: Path
+    summary: dict[str, Any]
+
+
+@dataclass(frozen=True)
+class PackageResult:
+    bundle: Path
+    sha256: str
+    manifest_sha256: str
+    files: int
+    merkle_root: str | None
+    manifest: dict[str, Any]
+
+
+@dataclass(frozen=True)
+class DiffResult:
+    added: list[dict[str, Any]]
+    removed: list[dict[str, Any]]
+    changed: list[dict[str, Any]]
+    unchanged: int
+    size_a: int
+    size_b: int
+    size_delta: int
+
+
+class Session:
+    # Holds parsed configs (keyed by path and stat), solver reports (keyed by
+    # the validated config), per-directory hash caches and the tool version,
+    # so repeated calls skip work a fresh `mwpack` process would redo.
+
+    def __init__(self, *, source_date_epoch: int | None = None, workers: int | None = None) -> None:
+        self.source_date_epoch = build.resolve_source_date_epoch(source_date_epoch)
+        self.workers = workers
+        self._tool_version: str | None = None
+        self._configs: dict[Path, tuple[tuple[int, int], dict[str, Any]]] = {}
+        self._reports: dict[str, dict[str, Any]] = {}
+        self._hash_caches: dict[Path, dict[str, Any]] = {}
+
+    @property
+    def tool_version(self) -> str:
+        if self._tool_version is None:
+            self._tool_version = build.tool_version()
+        return self._tool_version
+
+    def clear(self) -> None:
+        self._tool_version = None
+        self._configs.clear()
+        self._reports.clear()
+        self._hash_caches.clear()
+
+    def validate(self, memo: Path, config: Path | None = None) -> None:
+        schema.validate_memo_path(Path(memo))
+        if config is not None:
+            self.load_config(config)
+
+    def load_config(self, path: Path) -> dict[str, Any]:
+        resolved = Path(path).resolve()
+        try:
+            st = resolved.stat()
+        except OSError:
+            return schema.load_cluster_config(resolved)
+        signature = (st.st_mtime_ns, st.st_size)
+        cached = self._configs.get(resolved)
+        if cached is None or cached[0] != signature:
+            cached = (signature, schema.load_cluster_config(resolved))
+            self._configs[resolved] = cached
+        return copy.deepcopy(cached[1])
+
+    def solve(self, config: Path | dict[str, Any]) -> SolveResult:
+        report = self._solve_report(config)
+        return SolveResult(
+            nodes=report["nodes"],
+            gpus=report["gpus"],
+            p_total_w=report["p_total_w"],
+            feasible=report["feasible"],
+            status=report["status"],
+            report=report,
+        )
+
+    def sensitivity(self, config: Path | dict[str, Any]) -> dict[str, Any]:
+        return model.sensitivity(self._config(config))
+
+    def build(
+        self,
+        memo: Path,
+        *,
+        config: Path | None = None,
+        out: Path | None = None,
+        name: str | None = None,
+        keep: int = generations.KEEP_DEFAULT,
+    ) -> BuildResult:
+        cache: dict[str, Any] = {"tool_version": self.tool_version}
+        out_dir, summary = build.build_artifacts(
+            Path(memo),
+            None if config is None else Path(config),
+            out=None if out is None else Path(out),
+            name=name,
+            source_date_epoch=self.source_date_epoch,
+            cache=cache,
+            solve=self._solve_report,
+            keep=keep,
+        )
+        return BuildResult(
+            out_dir=out_dir,
+            memo=out_dir / "memo.md",
+            report=out_dir / "cluster_report.json",
+            summary_path=out_dir / "build_summary.json",
+            summary=summary,
+        )
+
+    def gc(self, out_dir: Path, *, keep: int = generations.KEEP_DEFAULT) -> list[Path]:
+        return generations.collect(Path(out_dir).absolute(), keep)
+
+    def package(
+        self,
+        directory: Path,
+        *,
+        fmt: str = "zip",
+        manifest_version: int = 1,
+        incremental: bool = False,
+        include: Iterable[str] = (),
+        exclude: Iterable[str] = (),
+        symlinks: str = "files",
+    ) -> PackageResult:
+        directory = Path(directory)
+        bundle, manifest = package.create_bundle(
+            directory,
+            fmt=fmt,
+            source_date_epoch=self.source_date_epoch,
+            manifest_version=manifest_version,
+            incremental=incremental,
+            include=include,
+            exclude=exclude,
+            symlinks=symlinks,
+            workers=self.workers,
+            hash_cache=self._hash_caches.setdefault(directory.resolve(), {}) if incremental else None,
+        )
+        return PackageResult(
+            bundle=bundle,
+            sha256=package.checksum_for_bundle(bundle),
+            manifest_sha256=package.checksum_for_manifest(manifest),
+            files=len(manifest["files"]),
+            merkle_root=manifest.get("root"),
+            manifest=manifest,
+        )
+
+    def diff(self, a: Path, b: Path, *, content: bool = False) -> DiffResult:
+        result = diff.diff_bundles(Path(a), Path(b), content=content)
+        return DiffResult(
+            added=result["added"],
+            removed=result["removed"],
+            changed=result["changed"],
+            unchanged=result["unchanged"],
+            size_a=result["size_a"],
+            size_b=result["size_b"],
+            size_delta=result["size_delta"],
+        )
+
+    def _config(self, config: Path | dict[str, Any]) -> dict[str, Any]:
+        if isinstance(config, dict):
+            return schema.validate_cluster_config(config)
+        return self.load_config(config)
+
+    def _solve_report(self, config: Path | dict[str, Any]) -> dict[str, Any]:
+        validated = self._config(config)
+        key = json.dumps(validated, sort_keys=True)
+        report = self._reports.get(key)
+        if report is None:
+            report = model.solve_cluster(validated)
+            self._reports[key] = report
+        return copy.deepcopy(report)
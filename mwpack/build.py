@@ -0,0 +1,155 @@
+"""Artifact directory builds shared by the CLI and the Python API."""
+
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import subprocess
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+from . import generations, model, normalize, schema
+from .errors import ValidationError
+from .hashing import sha256_file
+
+STAGES = frozenset({"normalize", "solve"})
+# The `cache` entry each stage produces.
+STAGE_KEYS = {"normalize": "memo", "solve": "report"}
+
+
+def build_artifacts(
+    memo: Path,
+    config: Path | None,
+    *,
+    out: Path | None,
+    name: str | None,
+    source_date_epoch: int,
+    cache: dict[str, Any],
+    stages: frozenset[str] = STAGES,
+    solve: Callable[[Path], dict[str, Any]] | None = None,
+    keep: int = generations.KEEP_DEFAULT,
+    background_gc: bool = True,
+) -> tuple[Path, dict[str, Any]]:
+    # `cache` carries the normalized memo, the report and the tool version
+    # between calls, so `stages` can skip whatever did not change. A stage
+    # whose entry is missing, because it never ran or last failed, always runs.
+    stages = stages | {stage for stage, key in STAGE_KEYS.items() if key not in cache}
+    if "normalize" in stages:
+        # Dropped first, so a failure cannot leave a stale memo to publish later.
+        cache.pop("memo", None)
+        schema.validate_memo_path(memo)
+        cache["memo"] = normalize.normalize_markdown_text(memo.read_text(encoding="utf-8"))
+
+    if "solve" in stages:
+        cache.pop("report", None)
+        if config is None:
+            report = model.empty_cluster_report()
+        elif solve is not None:
+            report = solve(config)
+        else:
+            report = model.solve_cluster(schema.load_cluster_config(config))
+        cache["report"] = to_json(report)
+
+    if "tool_version" not in cache:
+        cache["tool_version"] = tool_version()
+
+    name = artifact_name(name, memo)
+    out_dir = out if out is not None else Path("dist") / name
+    # Resolve the parent only: out_dir itself is the generation symlink.
+    out_dir = out_dir.absolute()
+    out_dir = out_dir.parent.resolve() / out_dir.name
+    out_dir.parent.mkdir(parents=True, exist_ok=True)
+
+    if out_dir.exists() and not out_dir.is_symlink():
+        cwd = Path.cwd().resolve()
+        home = Path.home().resolve()
+        if out_dir in {Path("/"), home, cwd} or cwd.is_relative_to(out_dir):
+            raise ValidationError(f"unsafe output directory: {out_dir}")
+
+    build_dir = generations.new_build_dir(out_dir)
+    published = False
+    try:
+        memo_out = build_dir / "memo.md"
+        report_out = build_dir / "cluster_report.json"
+
+        memo_out.write_text(cache["memo"], encoding="utf-8")
+        report_out.write_text(cache["report"], encoding="utf-8")
+
+        summary = {
+            "artifact_name": name,
+            "source_date_epoch": source_date_epoch,
+            "paths": {
+                "memo": str(out_dir / "memo.md"),
+                "report": str(out_dir / "cluster_report.json"),
+                "summary": str(out_dir / "build_summary.json"),
+                "bundle": str(out_dir / "bundle.zip"),
+            },
+            "sha256": {
+                "memo": sha256_file(memo_out),
+                "report": sha256_file(report_out),
+            },
+            "tool_version": cache["tool_version"],
+        }
+        summary_out = build_dir / "build_summary.json"
+        summary_out.write_text(to_json(summary), encoding="utf-8")
+
+        generations.publish(out_dir, build_dir)
+        published = True
+    finally:
+        if not published and build_dir.exists():
+            shutil.rmtree(build_dir, ignore_errors=True)
+
+    # Old generations go in the background, off the rebuild's critical path.
+    if background_gc:
+        generations.collect_in_background(out_dir, keep)
+    else:
+        generations.collect(out_dir, keep)
+    return out_dir, summary
+
+
+def resolve_source_date_epoch(value: int | None) -> int:
+    if value is not None:
+        if value < 0:
+            raise ValidationError("--source-date-epoch must be >= 0")
+        return value
+
+    env = os.getenv("SOURCE_DATE_EPOCH")
+    if env is None:
+        return 0
+    try:
+        parsed = int(env)
+    except ValueError as exc:
+        raise ValidationError("SOURCE_DATE_EPOCH must be an integer") from exc
+
+    if parsed < 0:
+        raise ValidationError("SOURCE_DATE_EPOCH must be >= 0")
+    return parsed
+
+
+def artifact_name(cli_name: str | None, memo_path: Path) -> str:
+    raw = cli_name if cli_name else memo_path.stem
+    chars = [c.lower() if c.isalnum() else "-" for c in raw.strip()]
+    normalized = "".join(chars).strip("-")
+    return normalized or "artifact"
+
+
+def tool_version() -> str:
+    try:
+        proc = subprocess.run(
+            ["git", "describe", "--tags", "--always", "--dirty"],
+            check=False,
+            capture_output=True,
+            text=True,
+        )
+    except OSError:
+        return "0.0.0"
+    if proc.returncode != 0:
+        return "0.0.0"
+    value = proc.stdout.strip()
+    return value if value else "0.0.0"
+
+
+def to_json(payload: Any) -> str:
+    return json.dumps(payload, indent=2, sort_keys=True) + "\n"
@@ -0,0 +1,293 @@
+"""Power-model calibration from streamed node and switch telemetry (CSV or JSONL)."""
+
+from __future__ import annotations
+
+import copy
+import csv
+import json
+import math
+from collections.abc import Iterable, Iterator
+from typing import Any, TextIO
+
+from . import model, schema, trace
+from .errors import ValidationError
+
+try:
+    import numpy as np
+except ImportError:  # optional: only speeds up the per-chunk sums
+    np = None
+
+TELEMETRY_FORMATS = trace.TRACE_FORMATS
+KINDS = ("node", "leaf", "spine", "optics")
+CHUNK_ROWS = 65_536
+PRIOR_WEIGHT = 1.0
+
+# Order of the node coefficient vector; `gpu_power_w` is per GPU.
+NODE_COMPONENTS = (
+    "gpu_power_w",
+    "cpu_power_w",
+    "baseboard_power_w",
+    "nic_power_w",
+    "storage_power_w",
+    "other_power_w",
+)
+FABRIC_PATHS = {
+    "leaf": "fabric.leaf.power_w",
+    "spine": "fabric.spine.power_w",
+    "optics": "fabric.optics_power_w_per_uplink",
+}
+# other_power_w is the catch-all: its prior is weak, so node power that no
+# component reading explains lands there instead of being spread evenly.
+OTHER_PRIOR_SCALE = 1e-4
+
+
+def iter_samples(handle: TextIO, fmt: str) -> Iterator[tuple[int, dict[str, Any]]]:
+    if fmt == "csv":
+        reader = csv.DictReader(handle)
+        if reader.fieldnames is None or "power_w" not in reader.fieldnames:
+            raise ValidationError("telemetry CSV must have a power_w column")
+        for row in reader:
+            # Empty cells are missing readings, not zeros.
+            yield reader.line_num, {key: value for key, value in row.items() if value not in (None, "")}
+    elif fmt == "jsonl":
+        for line_num, line in enumerate(handle, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError as exc:
+                raise ValidationError(f"telemetry line {line_num} is not valid JSON: {exc}") from exc
+            if not isinstance(row, dict):
+                raise ValidationError(f"telemetry line {line_num} must be an object")
+            yield line_num, {key: value for key, value in row.items() if value is not None}
+    else:
+        raise ValidationError(f"telemetry format must be one of: {', '.join(TELEMETRY_FORMATS)}")
+
+
+class Accumulator:
+    # Sufficient statistics of the least-squares problem: memory is constant
+    # in the number of samples, and rows are reduced one chunk at a time.
+    def __init__(self, gpu_count: int) -> None:
+        self.gpu_count = gpu_count
+        # Node wall-power rows: power_w = gpus * gpu_power_w + sum(other components).
+        self.n = 0
+        self.sum_g = 0.0
+        self.sum_gg = 0.0
+        self.sum_y = 0.0
+        self.sum_gy = 0.0
+        self.sum_yy = 0.0
+        # Direct component readings and switch/optics samples: count and sum.
+        self.readings = {key: [0, 0.0] for key in NODE_COMPONENTS}
+        self.fabric = {kind: [0, 0.0] for kind in FABRIC_PATHS}
+        self.rows = dict.fromkeys(KINDS, 0)
+        self._chunk = self._empty_chunk()
+        self._pending = 0
+
+    def add(self, row: dict[str, Any], line_num: int) -> None:
+        kind = row.get("kind", "node")
+        if kind not in KINDS:
+            raise ValidationError(f"telemetry line {line_num}: kind must be one of: {', '.join(KINDS)}")
+        self.rows[kind] += 1
+        chunk = self._chunk
+        if kind == "node":
+            seen = False
+            if "power_w" in row:
+                gpus = _sample(row, "gpus", line_num) if "gpus" in row else self.gpu_count
+                chunk["g"].append(gpus)
+                chunk["y"].append(_sample(row, "power_w", line_num))
+                seen = True
+            for key in NODE_COMPONENTS:
+                if key in row:
+                    chunk[key].append(_sample(row, key, line_num))
+                    seen = True
+            if not seen:
+                raise ValidationError(f"telemetry line {line_num}: node rows need power_w or a component reading")
+        else:
+            if "power_w" not in row:
+                raise ValidationError(f"telemetry line {line_num}: {kind} rows need power_w")
+            chunk[kind].append(_sample(row, "power_w", line_num))
+        self._pending += 1
+        if self._pending >= CHUNK_ROWS:
+            self.flush()
+
+    def flush(self) -> None:
+        chunk, self._chunk, self._pending = self._chunk, self._empty_chunk(), 0
+        g, y = chunk["g"], chunk["y"]
+        if y:
+            self.n += len(y)
+            if np is not None:
+                ga = np.asarray(g, dtype=np.float64)
+                ya = np.asarray(y, dtype=np.float64)
+                self.sum_g += float(ga.sum())
+                self.sum_gg += float(ga @ ga)
+                self.sum_y += float(ya.sum())
+                self.sum_gy += float(ga @ ya)
+                self.sum_yy += float(ya @ ya)
+            else:
+                self.sum_g += _fsum(g)
+                self.sum_gg += _fsum(v * v for v in g)
+                self.sum_y += _fsum(y)
+                self.sum_gy += _fsum(a * b for a, b in zip(g, y))
+                self.sum_yy += _fsum(v * v for v in y)
+        for key in NODE_COMPONENTS:
+            _add_sum(self.readings[key], chunk[key])
+        for kind in FABRIC_PATHS:
+            _add_sum(self.fabric[kind], chunk[kind])
+
+    def _empty_chunk(self) -> dict[str, list[float]]:
+        return {key: [] for key in ("g", "y", *NODE_COMPONENTS, *FABRIC_PATHS)}
+
+
+def calibrate(
+    config: dict[str, Any],
+    samples: Iterable[tuple[int, dict[str, Any]]],
+    *,
+    prior_weight: float = PRIOR_WEIGHT,
+) -> tuple[dict[str, Any], dict[str, Any]]:
+    if "node" not in config:
+        raise ValidationError("calibrate requires a single node config")
+    if not (math.isfinite(prior_weight) and prior_weight > 0):
+        raise ValidationError("--prior-weight must be a finite number > 0")
+
+    acc = Accumulator(config["node"]["gpu_count"])
+    for line_num, row in samples:
+        acc.add(row, line_num)
+    acc.flush()
+    if not any(acc.rows.values()):
+        raise ValidationError("telemetry has no samples")
+
+    node = config["node"]
+    prior = [float(node[key]) for key in NODE_COMPONENTS]
+    theta = _fit_node(acc, prior, prior_weight)
+
+    fitted: dict[str, float] = {f"node.{key}": value for key, value in zip(NODE_COMPONENTS, theta)}
+    for kind, key in FABRIC_PATHS.items():
+        count, total = acc.fabric[kind]
+        before = model.component_value(config, key)
+        # A constant's least-squares fit is its mean, shrunk toward the config value.
+        fitted[key] = (total + prior_weight * before) / (count + prior_weight)
+
+    calibrated = copy.deepcopy(config)
+    clamped: list[str] = []
+    coefficients: dict[str, dict[str, float]] = {}
+    for key, value in fitted.items():
+        # Sums of huge readings can overflow; clamping would hide that as 0.
+        if not math.isfinite(value):
+            raise ValidationError(f"calibration produced a non-finite value for {key}")
+        before = model.component_value(config, key)
+        value = round(value, 3)
+        # The schema requires these to stay positive (other/optics may be 0).
+        if key in {"node.other_power_w", "fabric.optics_power_w_per_uplink"}:
+            if value < 0:
+                clamped.append(key)
+                value = 0.0
+        elif not value > 0:
+            clamped.append(key)
+            value = before
+        _assign(calibrated, key, value)
+        coefficients[key] = {"before": before, "after": value}
+
+    calibrated = schema.validate_cluster_config(calibrated)
+    summary = {
+        "rows": dict(acc.rows),
+        "readings": {key: count for key, (count, _) in acc.readings.items() if count},
+        "numpy": np is not None,
+        "prior_weight": prior_weight,
+        "coefficients": coefficients,
+        "clamped": clamped,
+        "node_rmse_w": _node_rmse(acc, [calibrated["node"][key] for key in NODE_COMPONENTS]),
+    }
+    return calibrated, summary
+
+
+def _fit_node(acc: Accumulator, prior: list[float], prior_weight: float) -> list[float]:
+    # Normal equations of the stacked system: wall-power rows with features
+    # [gpus, 1, 1, 1, 1, 1], one unit row per component reading, and a ridge
+    # prior toward the current config that keeps unidentified directions put.
+    size = len(NODE_COMPONENTS)
+    a = [[0.0] * size for _ in range(size)]
+    b = [0.0] * size
+    a[0][0] = acc.sum_gg
+    b[0] = acc.sum_gy
+    for i in range(1, size):
+        a[0][i] = a[i][0] = acc.sum_g
+        b[i] = acc.sum_y
+        for j in range(1, size):
+            a[i][j] = float(acc.n)
+    for i, key in enumerate(NODE_COMPONENTS):
+        count, total = acc.readings[key]
+        weight = prior_weight * (OTHER_PRIOR_SCALE if key == "other_power_w" else 1.0)
+        a[i][i] += count + weight
+        b[i] += total + weight * prior[i]
+    return _solve(a, b)
+
+
+def _solve(a: list[list[float]], b: list[float]) -> list[float]:
+    # Gaussian elimination with partial pivoting; the prior makes `a`
+    # positive definite, so a pivot is always available.
+    if np is not None:
+        return [float(v) for v in np.linalg.solve(np.asarray(a), np.asarray(b))]
+    size = len(b)
+    m = [row[:] + [b[i]] for i, row in enumerate(a)]
+    for col in range(size):
+        pivot = max(range(col, size), key=lambda r: abs(m[r][col]))
+        m[col], m[pivot] = m[pivot], m[col]
+        for r in range(col + 1, size):
+            factor = m[r][col] / m[col][col]
+            if factor:
+                for c in range(col, size + 1):
+                    m[r][c] -= factor * m[col][c]
+    x = [0.0] * size
+    for r in range(size - 1, -1, -1):
+        x[r] = (m[r][size] - sum(m[r][c] * x[c] for c in range(r + 1, size))) / m[r][r]
+    return x
+
+
+def _node_rmse(acc: Accumulator, theta: list[float]) -> float | None:
+    if acc.n == 0:
+        return None
+    slope, intercept = theta[0], sum(theta[1:])
+    # sum((y - slope*g - intercept)^2) expanded over the accumulated sums.
+    sse = (
+        acc.sum_yy
+        - 2 * slope * acc.sum_gy
+        - 2 * intercept * acc.sum_y
+        + slope * slope * acc.sum_gg
+        + 2 * slope * intercept * acc.sum_g
+        + intercept * intercept * acc.n
+    )
+    if not math.isfinite(sse):
+        return None
+    return round(math.sqrt(max(0.0, sse) / acc.n), 3)
+
+
+def _add_sum(slot: list[Any], values: list[float]) -> None:
+    if not values:
+        return
+    slot[0] += len(values)
+    slot[1] += float(np.asarray(values, dtype=np.float64).sum()) if np is not None else _fsum(values)
+
+
+def _fsum(values: Iterable[float]) -> float:
+    # Overflow becomes inf, as it does on the NumPy path, and the fit rejects it.
+    try:
+        return math.fsum(values)
+    except OverflowError:
+        return math.inf
+
+
+def _sample(row: dict[str, Any], key: str, line_num: int) -> float:
+    try:
+        value = float(row[key])
+    except (TypeError, ValueError) as exc:
+        raise ValidationError(f"telemetry line {line_num}: {key} must be numeric") from exc
+    if not value >= 0 or math.isinf(value):
+        raise ValidationError(f"telemetry line {line_num}: {key} must be a finite number >= 0")
+    return value
+
+
+def _assign(config: dict[str, Any], key: str, value: float) -> None:
+    *parents, last = key.split(".")
+    for part in parents:
+        config = config[part]
+    config[last] = value
@@ -3,17 +3,22 @@
 from __future__ import annotations
 
 import argparse
+import contextlib
 import json
-import os
-import shutil
-import subprocess
-import tempfile
+import sys
+from collections.abc import Iterator
 from pathlib import Path
 from typing import Any
 
-from . import model, normalize, package, render, schema
-from .errors import ExitCode, RendererMissingError, ValidationError
-from .hashing import sha256_file
+from . import build, calibrate, diff, generations, model, montecarlo, package, pinning, render, reproduce, schema, trace, watch
+from .build import to_json as _json
+from .errors import ExitCode, MWPackError, RendererMissingError, ValidationError
+
+# `solve` options that only mean something in one mode.
+_SOLVE_MODE_OPTIONS = {
+    "monte_carlo": ("distributions", "seed", "workers"),
+    "trace": ("trace_format", "out"),
+}
 
 
 def build_parser() -> argparse.ArgumentParser:
@@ -32,15 +37,72 @@ def build_parser() -> argparse.ArgumentParser:
     b.add_argument("--name")
     b.add_argument("--json", action="store_true")
     b.add_argument("--source-date-epoch", type=int)
+    b.add_argument("--watch", action="store_true", help="rebuild on memo/config changes")
+    b.add_argument("--debounce-ms", type=_positive_int, default=50)
+    b.add_argument("--keep", type=_positive_int, default=generations.KEEP_DEFAULT, help="output generations to retain")
     b.set_defaults(func=_cmd_build)
 
+    s = sub.add_parser("solve", help="solve a cluster config and print the report")
+    s.add_argument("--config", required=True, type=Path)
+    mode = s.add_mutually_exclusive_group()
+    mode.add_argument("--monte-carlo", type=_positive_int, metavar="N", help="sample component powers N times")
+    mode.add_argument("--trace", type=Path, help="CSV/JSONL trace of it_cap_w values ('-' for stdin)")
+    mode.add_argument("--sensitivity", action="store_true", help="marginal nodes per watt and next breakpoints")
+    s.add_argument("--trace-format", choices=list(trace.TRACE_FORMATS))
+    s.add_argument("--out", type=Path, help="write trace results as JSONL to this path")
+    s.add_argument("--distributions", type=Path, help="JSON map of component key to distribution")
+    s.add_argument("--seed", type=int)
+    s.add_argument("--workers", type=_positive_int)
+    s.set_defaults(func=_cmd_solve)
+
+    c = sub.add_parser("calibrate", help="fit node and fabric power from telemetry")
+    c.add_argument("--config", required=True, type=Path)
+    c.add_argument("--telemetry", required=True, action="append", type=Path, help="CSV/JSONL samples ('-' for stdin)")
+    c.add_argument("--format", choices=list(calibrate.TELEMETRY_FORMATS))
+    c.add_argument("--out", required=True, type=Path, help="write the calibrated config here")
+    c.add_argument("--prior-weight", type=float, default=calibrate.PRIOR_WEIGHT, help="samples' worth of trust in --config")
+    c.add_argument("--json", action="store_true")
+    c.set_defaults(func=_cmd_calibrate)
+
     p = sub.add_parser("package", help="package deterministic archive")
     p.add_argument("--dir", required=True, type=Path)
     p.add_argument("--format", default="zip", choices=["zip", "tar.gz"])
     p.add_argument("--json", action="store_true")
     p.add_argument("--source-date-epoch", type=int)
+    p.add_argument("--manifest-version", type=int, default=1, choices=[1, 2])
+    p.add_argument("--incremental", action="store_true", help="reuse unchanged members and cached hashes")
+    p.add_argument("--include", action="append", default=[], metavar="GLOB")
+    p.add_argument("--exclude", action="append", default=[], metavar="GLOB")
+    p.add_argument("--symlinks", default="files", choices=list(package.SYMLINK_POLICIES))
+    p.add_argument("--workers", type=_positive_int, help="reader/hasher threads (default: CPU count, max 8)")
     p.set_defaults(func=_cmd_package)
 
+    d = sub.add_parser("diff", help="compare two bundles or payload directories by manifest")
+    d.add_argument("a", type=Path)
+    d.add_argument("b", type=Path)
+    d.add_argument("--content", action="store_true", help="unified diff of changed text members")
+    d.add_argument("--json", action="store_true")
+    d.set_defaults(func=_cmd_diff)
+
+    x = sub.add_parser("reproduce", help="rebuild recorded artifacts and compare their hashes")
+    x.add_argument("dirs", nargs="+", type=Path, metavar="DIR")
+    x.add_argument("--workers", type=_positive_int, help="rebuild processes (default: CPU count)")
+    x.add_argument("--json", action="store_true")
+    x.set_defaults(func=_cmd_reproduce)
+
+    g = sub.add_parser("gc", help="remove old build output generations")
+    g.add_argument("--out", required=True, type=Path)
+    g.add_argument("--keep", type=_positive_int, default=generations.KEEP_DEFAULT)
+    g.add_argument("--json", action="store_true")
+    g.set_defaults(func=_cmd_gc)
+
+    k = sub.add_parser("check-pins", help="require full commit SHA pins for third-party actions")
+    k.add_argument("repos", nargs="*", type=Path, default=[Path(".")], metavar="REPO")
+    k.add_argument("--workers", type=_positive_int, help="scanner processes (default: CPU count)")
+    k.add_argument("--cache", type=Path, help="JSON cache of results keyed by file sha256")
+    k.add_argument("--json", action="store_true")
+    k.set_defaults(func=_cmd_check_pins)
+
     r = sub.add_parser("render", help="best-effort rendering")
     r.add_argument("--memo", required=True, type=Path)
     r.add_argument("--out", type=Path)
@@ -64,74 +126,154 @@ def _cmd_validate(args: argparse.Namespace) -> int:
 
 
 def _cmd_build(args: argparse.Namespace) -> int:
-    source_date_epoch = _resolve_source_date_epoch(args.source_date_epoch)
-
-    schema.validate_memo_path(args.memo)
+    source_date_epoch = build.resolve_source_date_epoch(args.source_date_epoch)
+    cache: dict[str, Any] = {}
+    _build_stages(args, source_date_epoch, cache, stages=build.STAGES)
+    if not args.watch:
+        return int(ExitCode.OK)
+    return _watch_build(args, source_date_epoch, cache)
+
+
+def _build_stages(
+    args: argparse.Namespace,
+    source_date_epoch: int,
+    cache: dict[str, Any],
+    *,
+    stages: frozenset[str],
+) -> None:
+    out_dir, summary = build.build_artifacts(
+        args.memo,
+        args.config,
+        out=args.out,
+        name=args.name,
+        source_date_epoch=source_date_epoch,
+        cache=cache,
+        stages=stages,
+        keep=args.keep,
+    )
+    if args.json:
+        print(_json(summary).strip(), flush=True)
+    else:
+        print(f"Built artifact directory: {out_dir}", flush=True)
 
-    config: dict[str, Any] | None = None
-    if args.config is not None:
-        config = schema.load_cluster_config(args.config)
 
-    name = _artifact_name(args.name, args.memo)
-    out_dir = args.out if args.out is not None else Path("dist") / name
-    out_dir = out_dir.resolve()
-    out_dir.parent.mkdir(parents=True, exist_ok=True)
+def _watch_build(args: argparse.Namespace, source_date_epoch: int, cache: dict[str, Any]) -> int:
+    memo = args.memo.resolve()
+    config = args.config.resolve() if args.config is not None else None
+    watched = [memo] if config is None else [memo, config]
+    debounce = args.debounce_ms / 1000.0
 
-    temp_build_dir = Path(tempfile.mkdtemp(prefix=f".{name}.", dir=str(out_dir.parent)))
-    moved = False
+    print(f"watching {len(watched)} path(s); press Ctrl-C to stop", file=sys.stderr, flush=True)
     try:
-        memo_out = temp_build_dir / "memo.md"
-        report_out = temp_build_dir / "cluster_report.json"
-
-        normalize.normalize_markdown_file(args.memo, memo_out)
-
-        report = model.solve_max_nodes(config) if config is not None else model.empty_cluster_report()
-        report_out.write_text(_json(report), encoding="utf-8")
-
-        summary = {
-            "artifact_name": name,
-            "source_date_epoch": source_date_epoch,
-            "paths": {
-                "memo": str(out_dir / "memo.md"),
-                "report": str(out_dir / "cluster_report.json"),
-                "summary": str(out_dir / "build_summary.json"),
-                "bundle": str(out_dir / "bundle.zip"),
-            },
-            "sha256": {
-                "memo": sha256_file(memo_out),
-                "report": sha256_file(report_out),
-            },
-            "tool_version": _tool_version(),
-        }
-        summary_out = temp_build_dir / "build_summary.json"
-        summary_out.write_text(_json(summary), encoding="utf-8")
-
-        if out_dir.exists():
-            cwd = Path.cwd().resolve()
-            home = Path.home().resolve()
-            if out_dir in {Path("/"), home, cwd} or cwd.is_relative_to(out_dir):
-                raise ValidationError(f"unsafe output directory: {out_dir}")
-            shutil.rmtree(out_dir)
-        os.replace(temp_build_dir, out_dir)
-        moved = True
-
-        if args.json:
-            print(_json(summary).strip())
-        else:
-            print(f"Built artifact directory: {out_dir}")
+        for changed in watch.iter_changes(watched, interval=debounce, debounce=debounce):
+            stages = set()
+            if memo in changed:
+                stages.add("normalize")
+            if config is not None and config in changed:
+                stages.add("solve")
+            try:
+                _build_stages(args, source_date_epoch, cache, stages=frozenset(stages))
+            except MWPackError as exc:
+                print(f"error: {exc}", file=sys.stderr, flush=True)
+    except KeyboardInterrupt:
+        pass
+    return int(ExitCode.OK)
+
 
+def _cmd_solve(args: argparse.Namespace) -> int:
+    # Mode-specific options are rejected elsewhere rather than silently ignored.
+    for mode, options in _SOLVE_MODE_OPTIONS.items():
+        if getattr(args, mode) is None:
+            for option in options:
+                if getattr(args, option) is not None:
+                    raise ValidationError(f"{_flag(option)} requires {_flag(mode)}")
+    config = schema.load_cluster_config(args.config)
+    if args.trace is not None:
+        return _solve_trace(args, config)
+    if args.sensitivity:
+        print(_json(model.sensitivity(config)).strip())
         return int(ExitCode.OK)
-    finally:
-        if not moved and temp_build_dir.exists():
-            shutil.rmtree(temp_build_dir, ignore_errors=True)
+    if args.monte_carlo is None:
+        print(_json(model.solve_cluster(config)).strip())
+        return int(ExitCode.OK)
+
+    if args.distributions is None:
+        raise ValidationError("--monte-carlo requires --distributions")
+    distributions = montecarlo.load_distributions(args.distributions, config)
+    result = montecarlo.run(
+        config,
+        distributions,
+        samples=args.monte_carlo,
+        seed=args.seed if args.seed is not None else 0,
+        workers=args.workers,
+    )
+    print(_json(result).strip())
+    return int(ExitCode.OK)
+
+
+def _flag(dest: str) -> str:
+    return "--" + dest.replace("_", "-")
+
+
+def _solve_trace(args: argparse.Namespace, config: dict[str, Any]) -> int:
+    from_stdin = str(args.trace) == "-"
+    if from_stdin and args.trace_format is None:
+        raise ValidationError("--trace - requires --trace-format")
+    fmt = trace.trace_format(args.trace, args.trace_format)
+    if not from_stdin and not args.trace.is_file():
+        raise ValidationError(f"trace does not exist: {args.trace}")
+
+    with contextlib.ExitStack() as stack:
+        source = sys.stdin if from_stdin else stack.enter_context(args.trace.open(encoding="utf-8", newline=""))
+        sink = sys.stdout if args.out is None else stack.enter_context(args.out.open("w", encoding="utf-8"))
+        for record in trace.solve_trace(config, trace.iter_caps(source, fmt)):
+            sink.write(json.dumps(record, sort_keys=True) + "\n")
+    return int(ExitCode.OK)
+
+
+def _cmd_calibrate(args: argparse.Namespace) -> int:
+    config = schema.load_cluster_config(args.config)
+    for path in args.telemetry:
+        if str(path) == "-":
+            if args.format is None:
+                raise ValidationError("--telemetry - requires --format")
+        elif not path.is_file():
+            raise ValidationError(f"telemetry does not exist: {path}")
+        trace.trace_format(path, args.format, kind="telemetry", flag="--format")
+
+    calibrated, summary = calibrate.calibrate(config, _telemetry_samples(args), prior_weight=args.prior_weight)
+    args.out.write_text(_json(calibrated), encoding="utf-8")
+    summary["config"] = str(args.out)
+    if args.json:
+        print(_json(summary).strip())
+    else:
+        print(f"Calibrated config: {args.out} (node RMSE {summary['node_rmse_w']} W)")
+    return int(ExitCode.OK)
+
+
+def _telemetry_samples(args: argparse.Namespace) -> Iterator[tuple[int, dict[str, Any]]]:
+    for path in args.telemetry:
+        fmt = trace.trace_format(path, args.format, kind="telemetry", flag="--format")
+        with contextlib.ExitStack() as stack:
+            source = sys.stdin if str(path) == "-" else stack.enter_context(path.open(encoding="utf-8", newline=""))
+            try:
+                yield from calibrate.iter_samples(source, fmt)
+            except ValidationError as exc:
+                raise ValidationError(f"{path}: {exc}") from exc
 
 
 def _cmd_package(args: argparse.Namespace) -> int:
-    source_date_epoch = _resolve_source_date_epoch(args.source_date_epoch)
+    source_date_epoch = build.resolve_source_date_epoch(args.source_date_epoch)
     bundle_path, manifest = package.create_bundle(
         args.dir,
         fmt=args.format,
         source_date_epoch=source_date_epoch,
+        manifest_version=args.manifest_version,
+        incremental=args.incremental,
+        include=args.include,
+        exclude=args.exclude,
+        symlinks=args.symlinks,
+        workers=args.workers,
     )
 
     summary = {
@@ -142,6 +284,8 @@ def _cmd_package(args: argparse.Namespace) -> int:
         "manifest_sha256": package.checksum_for_manifest(manifest),
         "files": len(manifest["files"]),
     }
+    if "root" in manifest:
+        summary["merkle_root"] = manifest["root"]
 
     if args.json:
         print(_json(summary).strip())
@@ -151,6 +295,73 @@ def _cmd_package(args: argparse.Namespace) -> int:
     return int(ExitCode.OK)
 
 
+def _cmd_diff(args: argparse.Namespace) -> int:
+    result = diff.diff_bundles(args.a, args.b, content=args.content)
+    if args.json:
+        print(_json(result).strip())
+        return int(ExitCode.OK)
+
+    for entry in result["added"]:
+        print(f"added   {entry['path']} ({entry['size']} bytes)")
+    for entry in result["removed"]:
+        print(f"removed {entry['path']} ({entry['size']} bytes)")
+    for entry in result["changed"]:
+        print(f"changed {entry['path']} ({entry['size_a']} -> {entry['size_b']} bytes, {entry['size_delta']:+d})")
+        if entry.get("diff"):
+            sys.stdout.write(entry["diff"] if entry["diff"].endswith("\n") else entry["diff"] + "\n")
+    print(
+        f"{len(result['added'])} added, {len(result['removed'])} removed, "
+        f"{len(result['changed'])} changed, {result['unchanged']} unchanged; "
+        f"size delta {result['size_delta']:+d} bytes"
+    )
+    return int(ExitCode.OK)
+
+
+def _cmd_reproduce(args: argparse.Namespace) -> int:
+    result = reproduce.reproduce(args.dirs, workers=args.workers)
+    if args.json:
+        print(_json(result).strip())
+    else:
+        for artifact in result["artifacts"]:
+            if artifact["ok"]:
+                print(f"reproduced {artifact['dir']}")
+            elif "error" in artifact:
+                print(f"error      {artifact['dir']}: {artifact['error']}")
+            else:
+                print(f"diverged   {artifact['dir']}: first divergent member {artifact['first_divergence']}")
+    return int(ExitCode.OK if result["ok"] else ExitCode.VALIDATION_ERROR)
+
+
+def _cmd_gc(args: argparse.Namespace) -> int:
+    out_dir = args.out.absolute()
+    out_dir = out_dir.parent.resolve() / out_dir.name
+    removed = generations.collect(out_dir, args.keep)
+    if args.json:
+        print(_json({"out": str(out_dir), "keep": args.keep, "removed": [str(path) for path in removed]}).strip())
+    else:
+        for path in removed:
+            print(f"removed {path}")
+    return int(ExitCode.OK)
+
+
+def _cmd_check_pins(args: argparse.Namespace) -> int:
+    result = pinning.scan_repos(args.repos, workers=args.workers, cache_path=args.cache)
+    if args.json:
+        print(_json(result).strip())
+    else:
+        for report in result["repos"]:
+            for finding in report["findings"]:
+                print(f"{report['repo']}/{pinning.describe(finding)}")
+            for error in report["errors"]:
+                print(f"{report['repo']}/{error['file']}: unreadable: {error['error']}")
+        print(
+            f"{result['findings']} unpinned action(s) in {result['files']} file(s) "
+            f"across {len(result['repos'])} repo(s); {result['cached']} from cache"
+            + (f"; {result['errors']} unreadable" if result["errors"] else "")
+        )
+    return int(ExitCode.OK if result["ok"] else ExitCode.VALIDATION_ERROR)
+
+
 def _cmd_render(args: argparse.Namespace) -> int:
     schema.validate_memo_path(args.memo)
     out_dir = args.out if args.out is not None else args.memo.parent
@@ -171,47 +382,11 @@ def _cmd_render(args: argparse.Namespace) -> int:
     return int(ExitCode.OK)
 
 
-def _resolve_source_date_epoch(value: int | None) -> int:
-    if value is not None:
-        if value < 0:
-            raise ValidationError("--source-date-epoch must be >= 0")
-        return value
-
-    env = os.getenv("SOURCE_DATE_EPOCH")
-    if env is None:
-        return 0
+def _positive_int(value: str) -> int:
     try:
-        parsed = int(env)
+        parsed = int(value)
     except ValueError as exc:
-        raise ValidationError("SOURCE_DATE_EPOCH must be an integer") from exc
-
-    if parsed < 0:
-        raise ValidationError("SOURCE_DATE_EPOCH must be >= 0")
+        raise argparse.ArgumentTypeError(f"expected an integer: {value}") from exc
+    if parsed <= 0:
+        raise argparse.ArgumentTypeError(f"expected an integer > 0: {value}")
     return parsed
-
-
-def _artifact_name(cli_name: str | None, memo_path: Path) -> str:
-    raw = cli_name if cli_name else memo_path.stem
-    chars = [c.lower() if c.isalnum() else "-" for c in raw.strip()]
-    normalized = "".join(chars).strip("-")
-    return normalized or "artifact"
-
-
-def _tool_version() -> str:
-    try:
-        proc = subprocess.run(
-            ["git", "describe", "--tags", "--always", "--dirty"],
-            check=False,
-            capture_output=True,
-            text=True,
-        )
-    except OSError:
-        return "0.0.0"
-    if proc.returncode != 0:
-        return "0.0.0"
-    value = proc.stdout.strip()
-    return value if value else "0.0.0"
-
-
-def _json(payload: Any) -> str:
-    return json.dumps(payload, indent=2, sort_keys=True) + "\n"
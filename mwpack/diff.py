@@ -0,0 +1,138 @@
+"""Manifest-driven comparison of bundles and payload directories."""
+
+from __future__ import annotations
+
+import difflib
+import json
+import tarfile
+import zipfile
+from pathlib import Path
+from typing import Any
+
+from . import package
+from .errors import ValidationError
+
+TEXT_SUFFIXES = {".md", ".markdown", ".json", ".jsonl", ".txt", ".csv"}
+MAX_TEXT_BYTES = 1024 * 1024
+
+
+def source_kind(path: Path) -> str:
+    if path.is_dir():
+        return "dir"
+    if not path.is_file():
+        raise ValidationError(f"diff input does not exist: {path}")
+    if path.name.endswith(".zip"):
+        return "zip"
+    if path.name.endswith((".tar.gz", ".tgz")):
+        return "tar.gz"
+    raise ValidationError(f"diff input must be a directory, .zip or .tar.gz: {path}")
+
+
+def read_manifest(path: Path) -> dict[str, Any]:
+    kind = source_kind(path)
+    if kind == "dir":
+        return package.directory_manifest(path)
+    raw = read_members(path, {"MANIFEST.json"}).get("MANIFEST.json")
+    if raw is None:
+        raise ValidationError(f"bundle has no MANIFEST.json: {path}")
+    try:
+        manifest = json.loads(raw.decode("utf-8"))
+    except ValueError as exc:
+        raise ValidationError(f"bundle MANIFEST.json is not valid JSON: {path}") from exc
+    if not isinstance(manifest, dict) or not isinstance(manifest.get("files"), list):
+        raise ValidationError(f"bundle MANIFEST.json has no files list: {path}")
+    return manifest
+
+
+def read_members(path: Path, names: set[str]) -> dict[str, bytes]:
+    kind = source_kind(path)
+    found: dict[str, bytes] = {}
+    if kind == "dir":
+        for name in names:
+            candidate = path / name
+            if candidate.is_file():
+                found[name] = candidate.read_bytes()
+        return found
+    try:
+        if kind == "zip":
+            # The central directory locates each member; nothing else is read.
+            with zipfile.ZipFile(path, "r") as zf:
+                known = set(zf.namelist())
+                for name in names & known:
+                    found[name] = zf.read(name)
+            return found
+        # gzip has no index: one streaming pass, keeping only the wanted members.
+        with tarfile.open(path, "r:gz") as tf:
+            for member in tf:
+                if member.name in names and member.isfile():
+                    handle = tf.extractfile(member)
+                    if handle is not None:
+                        found[member.name] = handle.read()
+                        if len(found) == len(names):
+                            break
+    except (OSError, EOFError, zipfile.BadZipFile, tarfile.TarError) as exc:
+        raise ValidationError(f"cannot read bundle {path}: {exc}") from exc
+    return found
+
+
+def compare_manifests(before: dict[str, Any], after: dict[str, Any]) -> dict[str, Any]:
+    old = {entry["path"]: entry for entry in before["files"]}
+    new = {entry["path"]: entry for entry in after["files"]}
+    added = [{"path": rel, "size": new[rel]["size"]} for rel in sorted(new.keys() - old.keys())]
+    removed = [{"path": rel, "size": old[rel]["size"]} for rel in sorted(old.keys() - new.keys())]
+    changed: list[dict[str, Any]] = []
+    unchanged = 0
+    for rel in sorted(old.keys() & new.keys()):
+        if (old[rel]["size"], old[rel]["sha256"]) == (new[rel]["size"], new[rel]["sha256"]):
+            unchanged += 1
+            continue
+        changed.append(
+            {
+                "path": rel,
+                "size_a": old[rel]["size"],
+                "size_b": new[rel]["size"],
+                "size_delta": new[rel]["size"] - old[rel]["size"],
+            }
+        )
+    size_a = sum(entry["size"] for entry in old.values())
+    size_b = sum(entry["size"] for entry in new.values())
+    return {
+        "added": added,
+        "removed": removed,
+        "changed": changed,
+        "unchanged": unchanged,
+        "size_a": size_a,
+        "size_b": size_b,
+        "size_delta": size_b - size_a,
+    }
+
+
+def diff_bundles(a: Path, b: Path, *, content: bool = False) -> dict[str, Any]:
+    result = compare_manifests(read_manifest(a), read_manifest(b))
+    result["a"] = str(a)
+    result["b"] = str(b)
+    if content:
+        wanted = {
+            entry["path"]
+            for entry in result["changed"]
+            if Path(entry["path"]).suffix.lower() in TEXT_SUFFIXES
+            and max(entry["size_a"], entry["size_b"]) <= MAX_TEXT_BYTES
+        }
+        before = read_members(a, wanted) if wanted else {}
+        after = read_members(b, wanted) if wanted else {}
+        for entry in result["changed"]:
+            rel = entry["path"]
+            if rel in before and rel in after:
+                text = _unified(rel, before[rel], after[rel])
+                if text is not None:
+                    entry["diff"] = text
+    return result
+
+
+def _unified(rel: str, before: bytes, after: bytes) -> str | None:
+    try:
+        old = before.decode("utf-8").splitlines(keepends=True)
+        new = after.decode("utf-8").splitlines(keepends=True)
+    except UnicodeDecodeError:
+        return None
+    return "".join(difflib.unified_diff(old, new, fromfile=f"a/{rel}", tofile=f"b/{rel}"))
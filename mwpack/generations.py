@@ -0,0 +1,132 @@
+"""Generation directories behind an atomically swapped output symlink."""
+
+from __future__ import annotations
+
+import os
+import shutil
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+KEEP_DEFAULT = 2
+STALE_TEMP_SECONDS = 3600
+_GENERATION_PREFIX = "g"
+_TEMP_PREFIX = ".tmp."
+
+
+def generations_root(out_dir: Path) -> Path:
+    return out_dir.parent / f".{out_dir.name}.generations"
+
+
+def new_build_dir(out_dir: Path) -> Path:
+    root = generations_root(out_dir)
+    root.mkdir(parents=True, exist_ok=True)
+    return Path(tempfile.mkdtemp(prefix=_TEMP_PREFIX, dir=str(root)))
+
+
+def publish(out_dir: Path, build_dir: Path) -> Path:
+    # Rename the finished tree to the next generation, then flip out_dir with
+    # a single rename of a fresh symlink: readers see the old tree or the new
+    # one, never a missing directory.
+    legacy = None
+    if out_dir.is_dir() and not out_dir.is_symlink():
+        # One-time migration of a plain directory from before generations:
+        # its number is reserved first so it still sorts before the build.
+        legacy = _reserve(out_dir)
+
+    final = _reserve(out_dir)
+    os.replace(build_dir, final)
+    link = out_dir.parent / f".{out_dir.name}.link.{os.getpid()}.{threading.get_ident()}"
+    link.unlink(missing_ok=True)
+    os.symlink(os.path.relpath(final, out_dir.parent), link, target_is_directory=True)
+    try:
+        if legacy is not None:
+            # A symlink cannot be renamed over a directory, so the plain tree
+            # must move first: out_dir is missing between these two renames,
+            # the one window in the migration, and only on the first build.
+            os.replace(out_dir, legacy)
+        os.replace(link, out_dir)
+    except OSError:
+        link.unlink(missing_ok=True)
+        raise
+    return final
+
+
+def current(out_dir: Path) -> Path | None:
+    if not out_dir.is_symlink():
+        return None
+    return (out_dir.parent / os.readlink(out_dir)).resolve()
+
+
+def list_generations(out_dir: Path) -> list[Path]:
+    root = generations_root(out_dir)
+    if not root.is_dir():
+        return []
+    found = [
+        (number, entry)
+        for entry in root.iterdir()
+        if (number := _generation_number(entry.name)) is not None and entry.is_dir()
+    ]
+    return [entry for _, entry in sorted(found)]
+
+
+def collect(out_dir: Path, keep: int = KEEP_DEFAULT) -> list[Path]:
+    # Drop all but the newest `keep` generations and temp trees abandoned by
+    # interrupted builds.  The live generation and any numbered above it are
+    # never removed: those are claimed by concurrent builds not yet linked.
+    if keep < 1:
+        raise ValueError("keep must be >= 1")
+    live = current(out_dir)
+    live_number = _generation_number(live.name) if live is not None else None
+    doomed = [
+        path
+        for path in list_generations(out_dir)[:-keep]
+        if live_number is not None and (_generation_number(path.name) or 0) < live_number
+    ]
+
+    root = generations_root(out_dir)
+    if root.is_dir():
+        cutoff = time.time() - STALE_TEMP_SECONDS
+        for entry in root.iterdir():
+            if not entry.name.startswith(_TEMP_PREFIX):
+                continue
+            try:
+                mtime = entry.stat().st_mtime
+            except FileNotFoundError:
+                continue  # removed by another process's collect
+            if mtime < cutoff:
+                doomed.append(entry)
+
+    for path in doomed:
+        shutil.rmtree(path, ignore_errors=True)
+    return doomed
+
+
+def collect_in_background(out_dir: Path, keep: int = KEEP_DEFAULT) -> threading.Thread:
+    # Non-daemon, so a short-lived CLI process still finishes the cleanup
+    # after it has reported the new build.
+    thread = threading.Thread(target=collect, args=(out_dir, keep), name="mwpack-gc")
+    thread.start()
+    return thread
+
+
+def _reserve(out_dir: Path) -> Path:
+    # mkdir reserves the number, so concurrent builds cannot both take it;
+    # renaming a directory onto the reserved empty one is atomic.
+    while True:
+        generations = list_generations(out_dir)
+        number = _generation_number(generations[-1].name) + 1 if generations else 1
+        target = generations_root(out_dir) / f"{_GENERATION_PREFIX}{number:06d}"
+        try:
+            os.mkdir(target)
+        except FileExistsError:
+            continue
+        return target
+
+
+def _generation_number(name: str) -> int | None:
+    digits = name[len(_GENERATION_PREFIX) :]
+    if not name.startswith(_GENERATION_PREFIX) or not digits.isdigit():
+        return None
+    return int(digits)
@@ -3,7 +3,16 @@
 from __future__ import annotations
 
 import hashlib
+import mmap
+import os
+import stat
 from pathlib import Path
+from typing import BinaryIO
+
+CHUNK_SIZE = 1024 * 1024
+MMAP_THRESHOLD = 64 * 1024 * 1024
+
+_file_digest = getattr(hashlib, "file_digest", None)
 
 
 def sha256_bytes(data: bytes) -> str:
@@ -11,8 +20,32 @@ def sha256_bytes(data: bytes) -> str:
 
 
 def sha256_file(path: Path) -> str:
-    digest = hashlib.sha256()
     with path.open("rb") as handle:
-        for chunk in iter(lambda: handle.read(1024 * 1024), b""):
-            digest.update(chunk)
+        st = os.fstat(handle.fileno())
+        if stat.S_ISREG(st.st_mode) and st.st_size >= MMAP_THRESHOLD:
+            digest = _sha256_mmap(handle)
+            if digest is not None:
+                return digest
+        if _file_digest is not None:
+            return _file_digest(handle, "sha256").hexdigest()
+        return _sha256_readinto(handle)
+
+
+def _sha256_mmap(handle: BinaryIO) -> str | None:
+    try:
+        with mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            return hashlib.sha256(mapped).hexdigest()
+    except (OSError, ValueError):
+        return None
+
+
+def _sha256_readinto(handle: BinaryIO) -> str:
+    digest = hashlib.sha256()
+    buffer = bytearray(CHUNK_SIZE)
+    view = memoryview(buffer)
+    while True:
+        size = handle.readinto(buffer)
+        if not size:
+            break
+        digest.update(view[:size])
     return digest.hexdigest()
@@ -0,0 +1,158 @@
+"""Merkle-tree manifest (version 2) for partial verification and subtree reuse."""
+
+from __future__ import annotations
+
+import hashlib
+from collections.abc import Iterable
+from pathlib import Path
+from typing import Any
+
+from .errors import ValidationError
+
+MANIFEST_VERSION = 2
+CHUNK_SIZE = 1024 * 1024
+
+
+def leaf_hash(data: bytes | memoryview) -> str:
+    digest = hashlib.sha256(b"\x00")
+    digest.update(data)
+    return digest.hexdigest()
+
+
+def node_hash(left: str, right: str) -> str:
+    return hashlib.sha256(b"\x01" + bytes.fromhex(left) + bytes.fromhex(right)).hexdigest()
+
+
+def merkle_root(hashes: list[str]) -> str:
+    if not hashes:
+        return leaf_hash(b"")
+    level = hashes
+    while len(level) > 1:
+        level = [
+            node_hash(level[i], level[i + 1]) if i + 1 < len(level) else level[i]
+            for i in range(0, len(level), 2)
+        ]
+    return level[0]
+
+
+def file_record(rel: str, path: Path, *, chunk_size: int = CHUNK_SIZE) -> dict[str, Any]:
+    whole = hashlib.sha256()
+    chunks: list[str] = []
+    size = 0
+    buffer = bytearray(chunk_size)
+    view = memoryview(buffer)
+    with path.open("rb") as handle:
+        while True:
+            read = handle.readinto(buffer)
+            if not read:
+                break
+            piece = view[:read]
+            whole.update(piece)
+            chunks.append(leaf_hash(piece))
+            size += read
+    return chunked_record(rel, size, whole.hexdigest(), chunks)
+
+
+def chunked_record(rel: str, size: int, sha256: str, chunks: list[str]) -> dict[str, Any]:
+    return {
+        "path": rel,
+        "size": size,
+        "sha256": sha256,
+        "chunks": chunks,
+        "merkle_root": merkle_root(chunks),
+    }
+
+
+def directory_hashes(records: Iterable[dict[str, Any]]) -> dict[str, str]:
+    children: dict[str, list[tuple[str, str, str]]] = {"": []}
+    for record in records:
+        parts = record["path"].split("/")
+        for depth in range(1, len(parts)):
+            directory = "/".join(parts[:depth])
+            if directory not in children:
+                children[directory] = []
+                children["/".join(parts[: depth - 1])].append((parts[depth - 1], "tree", directory))
+        children["/".join(parts[:-1])].append((parts[-1], "blob", record["merkle_root"]))
+
+    hashes: dict[str, str] = {}
+    for directory in sorted(children, key=lambda d: (-_depth(d), d)):
+        digest = hashlib.sha256()
+        for name, kind, ref in sorted(children[directory]):
+            value = hashes[ref] if kind == "tree" else ref
+            digest.update(f"{kind} {name}\0{value}\n".encode("utf-8"))
+        hashes[directory] = digest.hexdigest()
+    return hashes
+
+
+def build_manifest(records: list[dict[str, Any]], *, chunk_size: int = CHUNK_SIZE) -> dict[str, Any]:
+    directories = directory_hashes(records)
+    return {
+        "version": MANIFEST_VERSION,
+        "chunk_size": chunk_size,
+        "root": directories[""],
+        "directories": directories,
+        "files": records,
+    }
+
+
+def verify_manifest(manifest: dict[str, Any]) -> None:
+    if manifest.get("version") != MANIFEST_VERSION:
+        raise ValidationError("manifest is not version 2")
+    for record in manifest["files"]:
+        if merkle_root(record["chunks"]) != record["merkle_root"]:
+            raise ValidationError(f"chunk hashes do not match merkle_root: {record['path']}")
+    if directory_hashes(manifest["files"]) != manifest["directories"]:
+        raise ValidationError("directory hashes do not match file entries")
+    if manifest["directories"].get("") != manifest["root"]:
+        raise ValidationError("manifest root does not match directory tree")
+
+
+def verify_files(
+    manifest: dict[str, Any],
+    directory: Path,
+    paths: Iterable[str] | None = None,
+) -> list[str]:
+    verify_manifest(manifest)
+    lookup = {record["path"]: record for record in manifest["files"]}
+    selected = sorted(lookup) if paths is None else sorted(set(paths))
+    mismatched: list[str] = []
+    for rel in selected:
+        record = lookup.get(rel)
+        candidate = directory / rel
+        if record is None or not candidate.is_file():
+            mismatched.append(rel)
+            continue
+        actual = file_record(rel, candidate, chunk_size=manifest["chunk_size"])
+        if actual["chunks"] != record["chunks"]:
+            mismatched.append(rel)
+    return mismatched
+
+
+def verify_chunk(manifest: dict[str, Any], path: str, index: int, data: bytes) -> bool:
+    for record in manifest["files"]:
+        if record["path"] == path:
+            chunks = record["chunks"]
+            return 0 <= index < len(chunks) and chunks[index] == leaf_hash(data)
+    return False
+
+
+def changed_paths(previous: dict[str, Any], current: dict[str, Any]) -> list[str]:
+    if "directories" not in previous or "directories" not in current:
+        old_all = {r["path"]: r["sha256"] for r in previous["files"]}
+        new_all = {r["path"]: r["sha256"] for r in current["files"]}
+        return sorted(p for p in set(old_all) | set(new_all) if old_all.get(p) != new_all.get(p))
+
+    old_dirs = previous["directories"]
+    new_dirs = current["directories"]
+    dirty = {d for d in set(old_dirs) | set(new_dirs) if old_dirs.get(d) != new_dirs.get(d)}
+    old_files = {r["path"]: r["merkle_root"] for r in previous["files"] if _parent(r["path"]) in dirty}
+    new_files = {r["path"]: r["merkle_root"] for r in current["files"] if _parent(r["path"]) in dirty}
+    return sorted(p for p in set(old_files) | set(new_files) if old_files.get(p) != new_files.get(p))
+
+
+def _parent(rel: str) -> str:
+    return rel.rpartition("/")[0]
+
+
+def _depth(directory: str) -> int:
+    return 0 if not directory else directory.count("/") + 1
@@ -2,14 +2,17 @@
 
 from __future__ import annotations
 
+import heapq
 import math
+from collections.abc import Callable, Iterable, Iterator, Sequence
 from typing import Any
 
 from .errors import ValidationError
 
+MAX_BRANCHES = 200_000
 
-def compute_node_power_w(config: dict[str, Any]) -> float:
-    node = config["node"]
+
+def node_power_w(node: dict[str, Any]) -> float:
     return (
         node["gpu_count"] * node["gpu_power_w"]
         + node["cpu_power_w"]
@@ -20,28 +23,169 @@ def compute_node_power_w(config: dict[str, Any]) -> float:
     )
 
 
+def compute_node_power_w(config: dict[str, Any]) -> float:
+    return node_power_w(config["node"])
+
+
+def fabric_counts(fabric: dict[str, Any], host_ports: int) -> tuple[int, int, int]:
+    if host_ports == 0:
+        return 0, 0, 0
+    leaves = math.ceil(host_ports / fabric["leaf"]["host_ports"])
+    uplinks_total = leaves * fabric["leaf"]["uplink_ports"]
+    spines = math.ceil(uplinks_total / fabric["spine"]["ports"]) if uplinks_total else 0
+    return leaves, uplinks_total, spines
+
+
+def fabric_power_w(fabric: dict[str, Any], leaves: int, uplinks_total: int, spines: int) -> float:
+    return (
+        leaves * fabric["leaf"]["power_w"]
+        + spines * fabric["spine"]["power_w"]
+        + uplinks_total * fabric["optics_power_w_per_uplink"]
+    )
+
+
+def _structural_node_limit(config: dict[str, Any]) -> int | None:
+    # Leaf, spine and optics counts only grow with n, so each budget caps the
+    # leaf count (and therefore n) before any power evaluation happens.
+    constraints = config.get("constraints", {})
+    fabric = config["fabric"]
+    leaf_up = fabric["leaf"]["uplink_ports"]
+    max_leaves: list[int] = []
+    if "max_leaves" in constraints:
+        max_leaves.append(constraints["max_leaves"])
+    if "max_spines" in constraints:
+        max_leaves.append(constraints["max_spines"] * fabric["spine"]["ports"] // leaf_up)
+    if "max_optics" in constraints:
+        max_leaves.append(constraints["max_optics"] // leaf_up)
+    if not max_leaves:
+        return None
+    return min(max_leaves) * (fabric["leaf"]["host_ports"] // fabric["host_ports_per_node"])
+
+
+def _oversubscription_limit(config: dict[str, Any], leaves: int) -> int:
+    # Most nodes that `leaves` leaves can host without exceeding
+    # max_oversubscription, using the same ratio arithmetic as the report.
+    fabric = config["fabric"]
+    nodes_per_leaf = fabric["leaf"]["host_ports"] // fabric["host_ports_per_node"]
+    full = leaves * nodes_per_leaf
+    limit = config.get("constraints", {}).get("max_oversubscription")
+    if limit is None or leaves <= 0:
+        return full
+
+    uplink_capacity = leaves * fabric["leaf"]["uplink_ports"] * fabric["uplink_gbps"]
+
+    def ratio(n: int) -> float:
+        return (n * fabric["host_ports_per_node"] * fabric["host_link_gbps"]) / uplink_capacity
+
+    n = min(full, int(limit * uplink_capacity / (fabric["host_ports_per_node"] * fabric["host_link_gbps"])))
+    while n > 0 and ratio(n) > limit:
+        n -= 1
+    while n < full and ratio(n + 1) <= limit:
+        n += 1
+    return n
+
+
+def _fit_oversubscription(config: dict[str, Any], nodes: int) -> int:
+    # The ratio rises within a leaf and drops when a new leaf is added, so the
+    # feasible set is a union of intervals: walk down one leaf at a time.
+    if "max_oversubscription" not in config.get("constraints", {}) or nodes == 0:
+        return nodes
+    fabric = config["fabric"]
+    nodes_per_leaf = fabric["leaf"]["host_ports"] // fabric["host_ports_per_node"]
+    leaves = -(-nodes // nodes_per_leaf)
+    while leaves > 0:
+        fit = min(nodes, _oversubscription_limit(config, leaves))
+        if fit > (leaves - 1) * nodes_per_leaf:
+            return fit
+        leaves -= 1
+        nodes = leaves * nodes_per_leaf
+    return 0
+
+
+def _binding_constraint(config: dict[str, Any], nodes: int) -> str:
+    # The constraint that rules out one more node; the power cap when no
+    # declared constraint does.
+    constraints = config.get("constraints", {})
+    fabric = config["fabric"]
+    host_ports = (nodes + 1) * fabric["host_ports_per_node"]
+    leaves, uplinks_total, spines = fabric_counts(fabric, host_ports)
+    if "max_leaves" in constraints and leaves > constraints["max_leaves"]:
+        return "max_leaves"
+    if "max_spines" in constraints and spines > constraints["max_spines"]:
+        return "max_spines"
+    if "max_optics" in constraints and uplinks_total > constraints["max_optics"]:
+        return "max_optics"
+    if "max_oversubscription" in constraints and (nodes + 1) > _oversubscription_limit(config, leaves):
+        return "max_oversubscription"
+    return "it_cap_w"
+
+
+def _check_constraints(config: dict[str, Any], report: dict[str, Any]) -> None:
+    constraints = config.get("constraints", {})
+    if (
+        report["leaves"] > constraints.get("max_leaves", report["leaves"])
+        or report["spines"] > constraints.get("max_spines", report["spines"])
+        or report["uplinks_total"] > constraints.get("max_optics", report["uplinks_total"])
+        or report["oversubscription_ratio"] > constraints.get("max_oversubscription", math.inf)
+    ):
+        raise RuntimeError("INV-003 violated: declared constraint exceeded")
+
+
 def evaluate_cluster(config: dict[str, Any], nodes: int) -> dict[str, Any]:
     if nodes < 0:
         raise ValidationError("nodes must be >= 0")
 
-    it_cap_w = config["it_cap_w"]
     node = config["node"]
+    return _cluster_report(
+        config,
+        nodes=nodes,
+        gpus=nodes * node["gpu_count"],
+        p_node_total_w=nodes * compute_node_power_w(config),
+        inputs={"node": node, "fabric": config["fabric"]},
+    )
+
+
+def evaluate_mixed_cluster(config: dict[str, Any], counts: list[int]) -> dict[str, Any]:
+    node_types = config["nodes"]
+    if len(counts) != len(node_types):
+        raise ValidationError("counts must match the number of node types")
+    if any(count < 0 for count in counts):
+        raise ValidationError("nodes must be >= 0")
+
+    report = _cluster_report(
+        config,
+        nodes=sum(counts),
+        gpus=sum(count * sku["gpu_count"] for count, sku in zip(counts, node_types)),
+        p_node_total_w=sum(count * node_power_w(sku) for count, sku in zip(counts, node_types)),
+        inputs={"nodes": node_types, "fabric": config["fabric"]},
+    )
+    report["node_types"] = [
+        {
+            "name": sku["name"],
+            "nodes": count,
+            "gpus": count * sku["gpu_count"],
+            "p_node_w": node_power_w(sku),
+        }
+        for count, sku in zip(counts, node_types)
+    ]
+    return report
+
+
+def _cluster_report(
+    config: dict[str, Any],
+    *,
+    nodes: int,
+    gpus: int,
+    p_node_total_w: float,
+    inputs: dict[str, Any],
+) -> dict[str, Any]:
+    it_cap_w = config["it_cap_w"]
     fabric = config["fabric"]
-    leaf = fabric["leaf"]
-    spine = fabric["spine"]
 
     host_ports = nodes * fabric["host_ports_per_node"]
-    if host_ports == 0:
-        leaves = 0
-        uplinks_total = 0
-        spines = 0
-    else:
-        leaves = math.ceil(host_ports / leaf["host_ports"])
-        uplinks_total = leaves * leaf["uplink_ports"]
-        spines = math.ceil(uplinks_total / spine["ports"]) if uplinks_total else 0
+    leaves, uplinks_total, spines = fabric_counts(fabric, host_ports)
 
-    p_node_total_w = nodes * compute_node_power_w(config)
-    p_switching_w = leaves * leaf["power_w"] + spines * spine["power_w"]
+    p_switching_w = leaves * fabric["leaf"]["power_w"] + spines * fabric["spine"]["power_w"]
     p_optics_w = uplinks_total * fabric["optics_power_w_per_uplink"]
     p_total_w = p_node_total_w + p_switching_w + p_optics_w
 
@@ -52,8 +196,10 @@ def evaluate_cluster(config: dict[str, Any], nodes: int) -> dict[str, Any]:
             host_ports * fabric["host_link_gbps"]
         ) / (uplinks_total * fabric["uplink_gbps"])
 
-    gpus = nodes * node["gpu_count"]
     gpus_per_mw = 0.0 if it_cap_w <= 0 else gpus / (it_cap_w / 1_000_000.0)
+    for key in ("constraints", "rack"):
+        if key in config:
+            inputs = {**inputs, key: config[key]}
 
     return {
         "feasible": p_total_w <= it_cap_w,
@@ -71,10 +217,95 @@ def evaluate_cluster(config: dict[str, Any], nodes: int) -> dict[str, Any]:
         "p_switching_w": p_switching_w,
         "p_optics_w": p_optics_w,
         "p_total_w": p_total_w,
-        "inputs": {
-            "node": node,
-            "fabric": fabric,
-        },
+        "inputs": inputs,
+    }
+
+
+def solve_cluster(config: dict[str, Any]) -> dict[str, Any]:
+    report = solve_mixed(config) if "nodes" in config else solve_max_nodes(config)
+    if "rack" in config:
+        report["racks"] = pack_racks(config, report)
+    return report
+
+
+def pack_racks(config: dict[str, Any], report: dict[str, Any]) -> dict[str, Any]:
+    # Next-fit in row order: each leaf (with its uplink optics) opens its group,
+    # then its nodes follow, spilling into the next rack when slots or power
+    # run out.  Every step takes as many identical devices as fit at once, so
+    # the cost is O(racks + leaves * node types) rather than O(nodes).
+    rack = config["rack"]
+    cap = rack["power_cap_w"]
+    fabric = config["fabric"]
+    nodes_per_leaf = fabric["leaf"]["host_ports"] // fabric["host_ports_per_node"]
+    leaf_w = fabric["leaf"]["power_w"] + fabric["leaf"]["uplink_ports"] * fabric["optics_power_w_per_uplink"]
+    spine_w = fabric["spine"]["power_w"]
+
+    if "node_types" in report:
+        runs = [[entry["p_node_w"], entry["nodes"]] for entry in report["node_types"] if entry["nodes"]]
+    else:
+        runs = [[compute_node_power_w(config), report["nodes"]]] if report["nodes"] else []
+    if report["leaves"] and leaf_w > cap:
+        raise ValidationError("rack.power_cap_w cannot host a leaf switch and its optics")
+    if any(node_w > cap for node_w, _ in runs):
+        raise ValidationError("rack.power_cap_w cannot host a single node")
+    if report["spines"] and spine_w > cap:
+        raise ValidationError("rack.power_cap_w cannot host a spine switch")
+
+    layout: list[dict[str, Any]] = []
+
+    def open_rack(kind: str) -> dict[str, Any]:
+        layout.append({"rack": len(layout), "kind": kind, "nodes": 0, "leaves": 0, "spines": 0, "p_w": 0.0})
+        return layout[-1]
+
+    current: dict[str, Any] | None = None
+    run = 0
+    for _ in range(report["leaves"]):
+        if current is None or current["leaves"] == rack["leaves_per_rack"] or current["p_w"] + leaf_w > cap:
+            current = open_rack("compute")
+        current["leaves"] += 1
+        current["p_w"] += leaf_w
+
+        group = nodes_per_leaf
+        while group and run < len(runs):
+            node_w, left = runs[run]
+            take = min(group, left, rack["slots"] - current["nodes"], int((cap - current["p_w"]) // node_w))
+            if take <= 0:
+                current = open_rack("compute")
+                continue
+            current["nodes"] += take
+            current["p_w"] += take * node_w
+            group -= take
+            runs[run][1] -= take
+            if runs[run][1] == 0:
+                run += 1
+
+    if report["spines"]:
+        per_rack = min(rack["slots"], int(cap // spine_w))
+        for start in range(0, report["spines"], per_rack):
+            spine_rack = open_rack("spine")
+            spine_rack["spines"] = min(per_rack, report["spines"] - start)
+            spine_rack["p_w"] = spine_rack["spines"] * spine_w
+
+    for entry in layout:
+        entry["stranded_w"] = cap - entry["p_w"]
+
+    compute_w = sum(entry["p_w"] for entry in layout if entry["kind"] == "compute")
+    compute_racks = sum(1 for entry in layout if entry["kind"] == "compute")
+    # Identical spines pack optimally in closed form; for compute racks the
+    # power, slot and leaf-position bounds show how far next-fit is from ideal.
+    lower_bound = max(
+        math.ceil(compute_w / cap) if compute_w else 0,
+        -(-report["nodes"] // rack["slots"]),
+        -(-report["leaves"] // rack["leaves_per_rack"]),
+    )
+    return {
+        "racks": len(layout),
+        "compute_racks": compute_racks,
+        "spine_racks": len(layout) - compute_racks,
+        "racks_lower_bound": lower_bound + len(layout) - compute_racks,
+        "power_cap_w": cap,
+        "stranded_w": sum(entry["stranded_w"] for entry in layout),
+        "layout": layout,
     }
 
 
@@ -85,6 +316,9 @@ def solve_max_nodes(config: dict[str, Any]) -> dict[str, Any]:
         raise ValidationError("computed node power must be > 0")
 
     hi = int(cap // node_power)
+    structural = _structural_node_limit(config)
+    if structural is not None:
+        hi = min(hi, structural)
     lo = 0
     best = 0
 
@@ -96,19 +330,420 @@ def solve_max_nodes(config: dict[str, Any]) -> dict[str, Any]:
             lo = mid + 1
         else:
             hi = mid - 1
+    best = _fit_oversubscription(config, best)
 
     report = evaluate_cluster(config, best)
     report["feasible"] = True
     report["status"] = "ok" if best > 0 else "no_feasible_nonzero"
+    report["binding_constraint"] = _binding_constraint(config, best)
 
     if report["p_total_w"] > cap:
         raise RuntimeError("INV-001 violated: p_total_w > it_cap_w")
     if report["inputs"]["fabric"]["leaf"]["host_ports"] + report["inputs"]["fabric"]["leaf"]["uplink_ports"] > report["inputs"]["fabric"]["leaf"]["ports"]:
         raise RuntimeError("INV-002 violated: leaf host+uplink exceeds radix")
+    _check_constraints(config, report)
 
     return report
 
 
+def sensitivity(config: dict[str, Any]) -> dict[str, Any]:
+    # Everything here follows from the step structure of evaluate_cluster:
+    # totals are linear in each component at fixed device counts, and device
+    # counts only change at leaf and spine breakpoints.
+    if "node" not in config:
+        raise ValidationError("sensitivity requires a single node config")
+
+    report = solve_max_nodes(config)
+    cap = config["it_cap_w"]
+    node = config["node"]
+    fabric = config["fabric"]
+    nodes = report["nodes"]
+    node_w = compute_node_power_w(config)
+    nodes_per_leaf = fabric["leaf"]["host_ports"] // fabric["host_ports_per_node"]
+    leaf_up = fabric["leaf"]["uplink_ports"]
+    spine_ports = fabric["spine"]["ports"]
+    per_node = {
+        "node.gpu_power_w": float(node["gpu_count"]),
+        "node.cpu_power_w": 1.0,
+        "node.baseboard_power_w": 1.0,
+        "node.nic_power_w": 1.0,
+        "node.storage_power_w": 1.0,
+        "node.other_power_w": 1.0,
+        "fabric.leaf.power_w": 1.0 / nodes_per_leaf,
+        "fabric.spine.power_w": leaf_up / spine_ports / nodes_per_leaf,
+        "fabric.optics_power_w_per_uplink": leaf_up / nodes_per_leaf,
+    }
+    # Amortized watts per node: n ~ cap / per_node_w, so dn/dx = cap / per_node_w**2 * dP/dx.
+    per_node_w = sum(component_value(config, key) * weight for key, weight in per_node.items())
+
+    following = evaluate_cluster(config, nodes + 1)
+    units_next = {
+        **{key: (nodes + 1) * weight for key, weight in per_node.items() if key.startswith("node.")},
+        "fabric.leaf.power_w": following["leaves"],
+        "fabric.spine.power_w": following["spines"],
+        "fabric.optics_power_w_per_uplink": following["uplinks_total"],
+    }
+    shortfall_w = following["p_total_w"] - cap
+    components: dict[str, Any] = {}
+    for key, weight in per_node.items():
+        value = component_value(config, key)
+        reduction: float | None = None
+        if report["binding_constraint"] == "it_cap_w" and units_next[key]:
+            reduction = shortfall_w / units_next[key]
+            if reduction > value:
+                reduction = None
+        nodes_per_w = cap / per_node_w**2 * weight
+        components[key] = {
+            "value": value,
+            "nodes_per_w": nodes_per_w,
+            "gpus_per_w": nodes_per_w * node["gpu_count"],
+            "reduction_w_for_next_node": reduction,
+        }
+
+    free_leaf_nodes = report["leaves"] * nodes_per_leaf - nodes
+    free_spine_leaves = (report["spines"] * spine_ports - report["uplinks_total"]) // leaf_up
+    to_next_leaf = free_leaf_nodes + 1
+    to_next_spine = free_spine_leaves * nodes_per_leaf + free_leaf_nodes + 1
+
+    def breakpoint(step: int) -> dict[str, Any]:
+        trial = evaluate_cluster(config, nodes + step)
+        return {"nodes": step, "p_total_w": trial["p_total_w"], "extra_cap_w": max(0.0, trial["p_total_w"] - cap)}
+
+    return {
+        "it_cap_w": cap,
+        "nodes": nodes,
+        "gpus": report["gpus"],
+        "p_total_w": report["p_total_w"],
+        "binding_constraint": report["binding_constraint"],
+        "stranded_w": cap - report["p_total_w"],
+        "p_node_w": node_w,
+        "p_per_node_amortized_w": per_node_w,
+        "next_node": {
+            "p_step_w": following["p_total_w"] - report["p_total_w"],
+            "extra_cap_w": max(0.0, shortfall_w),
+        },
+        "breakpoints": {"next_leaf": breakpoint(to_next_leaf), "next_spine": breakpoint(to_next_spine)},
+        "components": components,
+    }
+
+
+def component_value(config: dict[str, Any], key: str) -> float:
+    value: Any = config
+    for part in key.split("."):
+        value = value[part]
+    return float(value)
+
+
+def max_nodes_batch(config: dict[str, Any], samples: Iterable[Sequence[float]]) -> list[int]:
+    # Each sample is (node_power_w, leaf_power_w, spine_power_w, optics_power_w_per_uplink);
+    # the arithmetic mirrors evaluate_cluster so answers match solve_max_nodes exactly.
+    cap = config["it_cap_w"]
+    fabric = config["fabric"]
+    total_w = _stepwise_total_w(fabric)
+    leaf_up = fabric["leaf"]["uplink_ports"]
+    spine_ports = fabric["spine"]["ports"]
+    nodes_per_leaf = fabric["leaf"]["host_ports"] // fabric["host_ports_per_node"]
+    structural = _structural_node_limit(config)
+
+    out: list[int] = []
+    for node_w, leaf_w, spine_w, optics_w in samples:
+        if node_w <= 0:
+            raise ValidationError("computed node power must be > 0")
+        hi = int(cap // node_w)
+        if structural is not None:
+            hi = min(hi, structural)
+        # Amortized overhead never exceeds the stepwise overhead, so the guess
+        # is usually exact or one step high.
+        per_node_w = node_w + (leaf_w + leaf_up * optics_w + leaf_up / spine_ports * spine_w) / nodes_per_leaf
+        guess = min(hi, int(cap // per_node_w))
+        best = _gallop_max(lambda n: total_w(n, node_w, leaf_w, spine_w, optics_w) <= cap, guess, hi)
+        out.append(_fit_oversubscription(config, best))
+    return out
+
+
+def max_nodes_trace(config: dict[str, Any], caps: Iterable[float]) -> Iterator[tuple[int, float]]:
+    # Adjacent caps usually move the answer by a few leaf breakpoints, so each
+    # step gallops outward from the previous answer instead of a cold search.
+    fabric = config["fabric"]
+    total_w = _stepwise_total_w(fabric)
+    node_w = compute_node_power_w(config)
+    if node_w <= 0:
+        raise ValidationError("computed node power must be > 0")
+    leaf_w = fabric["leaf"]["power_w"]
+    spine_w = fabric["spine"]["power_w"]
+    optics_w = fabric["optics_power_w_per_uplink"]
+    structural = _structural_node_limit(config)
+
+    previous = 0
+    for cap in caps:
+        hi = int(cap // node_w)
+        if structural is not None:
+            hi = min(hi, structural)
+        previous = _gallop_max(lambda n: total_w(n, node_w, leaf_w, spine_w, optics_w) <= cap, previous, hi)
+        nodes = _fit_oversubscription(config, previous)
+        yield nodes, total_w(nodes, node_w, leaf_w, spine_w, optics_w)
+
+
+def _stepwise_total_w(fabric: dict[str, Any]) -> Callable[[int, float, float, float, float], float]:
+    host_ports_per_node = fabric["host_ports_per_node"]
+    leaf_host = fabric["leaf"]["host_ports"]
+    leaf_up = fabric["leaf"]["uplink_ports"]
+    spine_ports = fabric["spine"]["ports"]
+
+    def total_w(n: int, node_w: float, leaf_w: float, spine_w: float, optics_w: float) -> float:
+        if n == 0:
+            return 0.0
+        leaves = -(-(n * host_ports_per_node) // leaf_host)
+        uplinks_total = leaves * leaf_up
+        spines = -(-uplinks_total // spine_ports)
+        return n * node_w + (leaves * leaf_w + spines * spine_w) + uplinks_total * optics_w
+
+    return total_w
+
+
+def _gallop_max(feasible: Callable[[int], bool], start: int, hi: int) -> int:
+    # Largest n in [0, hi] with feasible(n), for monotone feasibility with
+    # feasible(0) true: exponential probing from start, then bisection.
+    if hi <= 0:
+        return 0
+    n = min(max(start, 0), hi)
+    if feasible(n):
+        lo, step = n, 1
+        while lo < hi:
+            probe = min(hi, lo + step)
+            if not feasible(probe):
+                hi = probe - 1
+                break
+            lo = probe
+            step *= 2
+    else:
+        hi, step = n - 1, 1
+        while True:
+            probe = max(0, n - step)
+            if probe == 0 or feasible(probe):
+                lo = probe
+                break
+            hi = probe - 1
+            step *= 2
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if feasible(mid):
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
+def solve_mixed(
+    config: dict[str, Any],
+    *,
+    value: Callable[[dict[str, Any]], float] | None = None,
+    max_branches: int = MAX_BRANCHES,
+) -> dict[str, Any]:
+    cap = config["it_cap_w"]
+    fabric = config["fabric"]
+    node_types = config["nodes"]
+    if value is None:
+        value = _objective(config.get("objective", "weighted_gpus"))
+
+    items: list[tuple[int, float, float, int]] = []
+    for index, sku in enumerate(node_types):
+        power = node_power_w(sku)
+        if power <= 0:
+            raise ValidationError(f"computed node power must be > 0: {sku['name']}")
+        worth = float(value(sku))
+        if worth <= 0:
+            continue
+        limit = int(cap // power)
+        if sku.get("max_count") is not None:
+            limit = min(limit, sku["max_count"])
+        if limit > 0:
+            items.append((index, worth, power, limit))
+
+    # Fabric overhead is a step function of the leaf count L, so each L is a
+    # bounded knapsack with a fixed power budget and at most L * nodes_per_leaf
+    # nodes.  Tiers are solved best-bound-first until no bound beats the
+    # incumbent; larger L stop mattering once the node cap can no longer bind.
+    nodes_per_leaf = fabric["leaf"]["host_ports"] // fabric["host_ports_per_node"]
+    structural = _structural_node_limit(config)
+    max_leaves = None if structural is None else structural // nodes_per_leaf
+    max_nodes = sum(item[3] for item in items)
+    min_power = min((item[2] for item in items), default=0.0)
+    power_order = _by_reduced_density(items, 0.0)
+    top_worth = max((item[1] for item in items), default=0.0)
+
+    # Each heap entry starts with the cheaper of the power-only and count-only
+    # bounds; the Lagrangian bound is computed lazily when a tier reaches the top.
+    tiers: list[tuple[float, int, bool, float, int, int, float]] = []
+    leaves = 1
+    while items and (max_leaves is None or leaves <= max_leaves):
+        uplinks_total = leaves * fabric["leaf"]["uplink_ports"]
+        spines = math.ceil(uplinks_total / fabric["spine"]["ports"])
+        budget = cap - fabric_power_w(fabric, leaves, uplinks_total, spines)
+        if budget < min_power:
+            break
+        node_limit = _oversubscription_limit(config, leaves)
+        # Once max_oversubscription binds, tier L only admits node counts that
+        # really need L leaves; fewer would be rated against fewer uplinks.
+        min_nodes = 0 if node_limit == leaves * nodes_per_leaf else (leaves - 1) * nodes_per_leaf + 1
+        node_limit = min(node_limit, max_nodes)
+        if node_limit < min_nodes:
+            break
+        unbound = node_limit >= min(max_nodes, budget / min_power)
+        bound = _relaxed_bound(power_order, 0.0, budget, node_limit)
+        if not unbound:
+            bound = min(bound, node_limit * top_worth)
+        tiers.append((-bound, leaves, unbound, budget, node_limit, min_nodes, 0.0))
+        if unbound:
+            break
+        leaves += 1
+    heapq.heapify(tiers)
+
+    best_value = 0.0
+    best_counts = [0] * len(node_types)
+    branches = [max_branches]
+    upper_bound = 0.0
+    while tiers:
+        negative_bound, leaves, refined, budget, node_limit, min_nodes, multiplier = heapq.heappop(tiers)
+        if -negative_bound <= best_value:
+            break
+        if not refined:
+            multiplier, bound = _lagrangian_bound(items, budget, node_limit)
+            heapq.heappush(
+                tiers, (-min(bound, -negative_bound), leaves, True, budget, node_limit, min_nodes, multiplier)
+            )
+            continue
+
+        found, counts, complete = _branch_and_bound(
+            items, budget, node_limit, multiplier, best_value, branches, min_nodes=min_nodes
+        )
+        if counts is not None and found > best_value:
+            best_value = found
+            best_counts = [0] * len(node_types)
+            for (index, _, _, _), count in counts:
+                best_counts[index] = count
+        if not complete:
+            upper_bound = max(-negative_bound, *(-tier[0] for tier in tiers), 0.0)
+            break
+
+    report = evaluate_mixed_cluster(config, best_counts)
+    report["feasible"] = True
+    report["status"] = "ok" if report["nodes"] > 0 else "no_feasible_nonzero"
+    report["objective_value"] = best_value
+    report["optimal"] = upper_bound <= best_value
+    report["objective_upper_bound"] = max(upper_bound, best_value)
+    report["binding_constraint"] = _binding_constraint(config, report["nodes"])
+
+    if report["p_total_w"] > cap:
+        raise RuntimeError("INV-001 violated: p_total_w > it_cap_w")
+    if fabric["leaf"]["host_ports"] + fabric["leaf"]["uplink_ports"] > fabric["leaf"]["ports"]:
+        raise RuntimeError("INV-002 violated: leaf host+uplink exceeds radix")
+    _check_constraints(config, report)
+
+    return report
+
+
+def _objective(name: str) -> Callable[[dict[str, Any]], float]:
+    if name == "weighted_gpus":
+        return lambda sku: sku["gpu_count"] * sku["weight"]
+    if name == "nodes":
+        return lambda sku: 1.0
+    raise ValidationError(f"unknown objective: {name}")
+
+
+def _relaxed_bound(
+    items: list[tuple[int, float, float, int]],
+    multiplier: float,
+    power_left: float,
+    nodes_left: int,
+) -> float:
+    # LP bound with the node-count constraint priced in at `multiplier`;
+    # valid for any multiplier >= 0.  Items must be sorted by reduced density.
+    bound = multiplier * nodes_left
+    for _, worth, power, limit in items:
+        reduced = worth - multiplier
+        if reduced <= 0 or power_left <= 0:
+            break
+        take = min(float(limit), power_left / power)
+        bound += take * reduced
+        power_left -= take * power
+    return bound
+
+
+def _by_reduced_density(items: list[tuple[int, float, float, int]], multiplier: float) -> list[tuple[int, float, float, int]]:
+    return sorted(items, key=lambda item: (-(item[1] - multiplier) / item[2], item[0]))
+
+
+def _lagrangian_bound(items: list[tuple[int, float, float, int]], budget: float, node_limit: int) -> tuple[float, float]:
+    def dual(multiplier: float) -> float:
+        return _relaxed_bound(_by_reduced_density(items, multiplier), multiplier, budget, node_limit)
+
+    # The dual is convex and piecewise linear in the multiplier.
+    lo, hi = 0.0, max(item[1] for item in items)
+    best = min((dual(lo), lo), (dual(hi), hi))
+    for _ in range(32):
+        left = lo + (hi - lo) / 3.0
+        right = hi - (hi - lo) / 3.0
+        left_value, right_value = dual(left), dual(right)
+        best = min(best, (left_value, left), (right_value, right))
+        if left_value <= right_value:
+            hi = right
+        else:
+            lo = left
+    return best[1], best[0]
+
+
+def _branch_and_bound(
+    items: list[tuple[int, float, float, int]],
+    budget: float,
+    node_limit: int,
+    multiplier: float,
+    floor: float,
+    branches: list[int],
+    *,
+    min_nodes: int = 0,
+) -> tuple[float, list[tuple[tuple[int, float, float, int], int]] | None, bool]:
+    ordered = _by_reduced_density(items, multiplier)
+    size = len(ordered)
+    counts = [0] * size
+    best: list[Any] = [floor, None]
+
+    def search(k: int, power_left: float, nodes_left: int, total: float) -> bool:
+        if total > best[0] and node_limit - nodes_left >= min_nodes:
+            best[0] = total
+            best[1] = counts.copy()
+        if k == size or nodes_left == 0:
+            return True
+        branches[0] -= 1
+        if branches[0] < 0:
+            return False
+        if total + _relaxed_bound(ordered[k:], multiplier, power_left, nodes_left) <= best[0]:
+            return True
+
+        _, worth, power, limit = ordered[k]
+        top = max(0, min(limit, int(power_left // power), nodes_left))
+        # The relaxed bound is monotone in this item's count: it never grows
+        # as the count moves away from the LP choice, so the scan can stop at
+        # the first count that cannot beat the incumbent.
+        candidates = range(top, -1, -1) if worth >= multiplier else range(0, top + 1)
+        for count in candidates:
+            rest = power_left - count * power
+            left = nodes_left - count
+            if total + count * worth + _relaxed_bound(ordered[k + 1 :], multiplier, rest, left) <= best[0]:
+                break
+            counts[k] = count
+            if not search(k + 1, rest, left, total + count * worth):
+                counts[k] = 0
+                return False
+        counts[k] = 0
+        return True
+
+    complete = search(0, budget, node_limit, 0.0)
+    if best[1] is None:
+        return best[0], None, complete
+    return best[0], list(zip(ordered, best[1])), complete
+
+
 def empty_cluster_report() -> dict[str, Any]:
     return {
         "feasible": True,
@@ -0,0 +1,204 @@
+"""Monte Carlo uncertainty analysis over component power distributions."""
+
+from __future__ import annotations
+
+import json
+import os
+import random
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any
+
+from . import model
+from .errors import ValidationError
+
+CHUNK_SIZE = 50_000
+PERCENTILES = (1, 5, 50, 95, 99)
+
+NODE_KEYS = (
+    "node.gpu_power_w",
+    "node.cpu_power_w",
+    "node.baseboard_power_w",
+    "node.nic_power_w",
+    "node.storage_power_w",
+    "node.other_power_w",
+)
+FABRIC_KEYS = (
+    "fabric.leaf.power_w",
+    "fabric.spine.power_w",
+    "fabric.optics_power_w_per_uplink",
+)
+SAMPLED_KEYS = NODE_KEYS + FABRIC_KEYS
+
+
+def load_distributions(path: Path, config: dict[str, Any]) -> dict[str, dict[str, Any]]:
+    if not path.exists() or not path.is_file():
+        raise ValidationError(f"distributions file does not exist: {path}")
+    try:
+        payload = json.loads(path.read_text(encoding="utf-8"))
+    except json.JSONDecodeError as exc:
+        raise ValidationError(f"distributions file is not valid JSON: {exc}") from exc
+    return validate_distributions(payload, config)
+
+
+def validate_distributions(payload: Any, config: dict[str, Any]) -> dict[str, dict[str, Any]]:
+    if "node" not in config:
+        raise ValidationError("monte carlo requires a single node config")
+    if not isinstance(payload, dict):
+        raise ValidationError("distributions must be an object")
+
+    out: dict[str, dict[str, Any]] = {}
+    for key, spec in sorted(payload.items()):
+        if key not in SAMPLED_KEYS:
+            raise ValidationError(f"unsupported distribution key: {key}")
+        if not isinstance(spec, dict):
+            raise ValidationError(f"{key} must be an object")
+        point = model.component_value(config, key)
+        dist = spec.get("dist")
+        if dist == "normal":
+            out[key] = {
+                "dist": dist,
+                "mean": _number(spec, "mean", key, default=point),
+                "stddev": _number(spec, "stddev", key, minimum=0.0),
+            }
+        elif dist == "uniform":
+            low = _number(spec, "low", key, minimum=0.0)
+            high = _number(spec, "high", key, minimum=low)
+            out[key] = {"dist": dist, "low": low, "high": high}
+        elif dist == "triangular":
+            low = _number(spec, "low", key, minimum=0.0)
+            high = _number(spec, "high", key, minimum=low)
+            mode = _number(spec, "mode", key, default=point)
+            if not low <= mode <= high:
+                raise ValidationError(f"{key}.mode must be within [low, high]")
+            out[key] = {"dist": dist, "low": low, "high": high, "mode": mode}
+        else:
+            raise ValidationError(f"{key}.dist must be normal, uniform or triangular")
+    return out
+
+
+def run(
+    config: dict[str, Any],
+    distributions: dict[str, dict[str, Any]],
+    *,
+    samples: int,
+    seed: int = 0,
+    workers: int | None = None,
+) -> dict[str, Any]:
+    if samples <= 0:
+        raise ValidationError("--monte-carlo must be > 0")
+
+    plan = model.solve_max_nodes(config)
+    chunks = [
+        (config, distributions, plan["nodes"], seed, index, min(CHUNK_SIZE, samples - start))
+        for index, start in enumerate(range(0, samples, CHUNK_SIZE))
+    ]
+    workers = max(1, min(workers or os.cpu_count() or 1, len(chunks)))
+
+    histogram: Counter[int] = Counter()
+    exceeded = 0
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        results = pool.map(_run_chunk, chunks) if pool is not None else map(_run_chunk, chunks)
+        for counts, over in results:
+            histogram.update(counts)
+            exceeded += over
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    return {
+        "samples": samples,
+        "seed": seed,
+        "workers": workers,
+        "it_cap_w": config["it_cap_w"],
+        "plan_nodes": plan["nodes"],
+        "p_exceed_it_cap": exceeded / samples,
+        "nodes": _summarize(histogram, samples),
+        "distributions": distributions,
+    }
+
+
+def _run_chunk(
+    task: tuple[dict[str, Any], dict[str, dict[str, Any]], int, int, int, int],
+) -> tuple[dict[int, int], int]:
+    config, distributions, plan_nodes, seed, index, size = task
+    # Seeding by chunk index (not worker) keeps results independent of --workers.
+    rng = random.Random(f"mwpack-monte-carlo:{seed}:{index}")
+    node = config["node"]
+    fabric = config["fabric"]
+
+    # Columnar draws: one list per component, constants for unsampled keys.
+    columns = {
+        key: _draw(rng, distributions[key], size) if key in distributions else [model.component_value(config, key)] * size
+        for key in SAMPLED_KEYS
+    }
+    gpu_count = node["gpu_count"]
+    node_w = [
+        gpu_count * gpu + cpu + baseboard + nic + storage + other
+        for gpu, cpu, baseboard, nic, storage, other in zip(*(columns[key] for key in NODE_KEYS))
+    ]
+    batch = list(zip(node_w, *(columns[key] for key in FABRIC_KEYS)))
+
+    counts = Counter(model.max_nodes_batch(config, batch))
+
+    cap = config["it_cap_w"]
+    host_ports = plan_nodes * fabric["host_ports_per_node"]
+    leaves, uplinks_total, spines = model.fabric_counts(fabric, host_ports)
+    exceeded = sum(
+        1
+        for node_w, leaf_w, spine_w, optics_w in batch
+        if plan_nodes * node_w + (leaves * leaf_w + spines * spine_w) + uplinks_total * optics_w > cap
+    )
+    return dict(counts), exceeded
+
+
+def _draw(rng: random.Random, spec: dict[str, Any], size: int) -> list[float]:
+    if spec["dist"] == "normal":
+        gauss, mean, stddev = rng.gauss, spec["mean"], spec["stddev"]
+        return [max(0.0, gauss(mean, stddev)) for _ in range(size)]
+    if spec["dist"] == "uniform":
+        uniform, low, high = rng.uniform, spec["low"], spec["high"]
+        return [uniform(low, high) for _ in range(size)]
+    triangular, low, high, mode = rng.triangular, spec["low"], spec["high"], spec["mode"]
+    return [triangular(low, high, mode) for _ in range(size)]
+
+
+def _summarize(histogram: Counter[int], samples: int) -> dict[str, Any]:
+    values = sorted(histogram)
+    summary: dict[str, Any] = {
+        "min": values[0],
+        "max": values[-1],
+        "mean": sum(value * count for value, count in histogram.items()) / samples,
+    }
+    for pct in PERCENTILES:
+        # Nearest-rank percentile over the histogram.
+        rank = max(1, -(-pct * samples // 100))
+        seen = 0
+        for value in values:
+            seen += histogram[value]
+            if seen >= rank:
+                summary[f"p{pct:02d}"] = value
+                break
+    return summary
+
+
+def _number(
+    spec: dict[str, Any],
+    field: str,
+    key: str,
+    *,
+    default: float | None = None,
+    minimum: float | None = None,
+) -> float:
+    if field not in spec:
+        if default is None:
+            raise ValidationError(f"missing required key: {key}.{field}")
+        return default
+    value = spec[field]
+    if not isinstance(value, (int, float)) or isinstance(value, bool):
+        raise ValidationError(f"{key}.{field} must be numeric")
+    if minimum is not None and value < minimum:
+        raise ValidationError(f"{key}.{field} must be >= {minimum}")
+    return float(value)
@@ -2,53 +2,135 @@
 
 from __future__ import annotations
 
+import copy
+import fnmatch
 import gzip
 import io
 import json
+import os
+import struct
 import tarfile
+import time
 import zipfile
+from collections.abc import Callable, Iterable, Iterator
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any
+from typing import IO, Any, BinaryIO
 
+from . import merkle, pipeline
 from .errors import ValidationError
-from .hashing import sha256_bytes, sha256_file
+from .hashing import CHUNK_SIZE, sha256_bytes, sha256_file
 
-_IGNORED_BUNDLE_NAMES = {"bundle.zip", "bundle.tar.gz", "MANIFEST.json"}
+PayloadFile = tuple[str, Path, os.stat_result]
 
+IGNORE_FILE_NAME = ".mwpackignore"
+SYMLINK_POLICIES = ("files", "skip", "all", "error")
+HASH_CACHE_NAME = ".mwpack-cache.json"
+_PARTIAL_NAMES = {".bundle.zip.partial"}
+_IGNORED_BUNDLE_NAMES = {"bundle.zip", "bundle.tar.gz", "MANIFEST.json", HASH_CACHE_NAME} | _PARTIAL_NAMES
+# Cache entries modified this close to the cache write are re-hashed (coarse mtime granularity).
+_CACHE_SLACK_NS = 2_000_000_000
+_ZIP_EXTERNAL_ATTR = 0o100644 << 16
 
-def create_bundle(directory: Path, *, fmt: str = "zip", source_date_epoch: int = 0) -> tuple[Path, dict[str, Any]]:
+
+def create_bundle(
+    directory: Path,
+    *,
+    fmt: str = "zip",
+    source_date_epoch: int = 0,
+    manifest_version: int = 1,
+    incremental: bool = False,
+    include: Iterable[str] = (),
+    exclude: Iterable[str] = (),
+    symlinks: str = "files",
+    workers: int | None = None,
+    hash_cache: dict[str, Any] | None = None,
+) -> tuple[Path, dict[str, Any]]:
     if not directory.exists() or not directory.is_dir():
         raise ValidationError(f"package dir does not exist: {directory}")
     if source_date_epoch < 0:
         raise ValidationError("source_date_epoch must be >= 0")
-
-    files = _sorted_payload_files(directory)
-    manifest = {
-        "version": 1,
-        "files": [
-            {
-                "path": rel,
-                "size": abs_path.stat().st_size,
-                "sha256": sha256_file(abs_path),
-            }
-            for rel, abs_path in files
-        ],
-    }
-    manifest_bytes = (json.dumps(manifest, sort_keys=True, indent=2) + "\n").encode("utf-8")
-
-    if fmt == "zip":
-        bundle_path = directory / "bundle.zip"
-        _write_zip(bundle_path, files, manifest_bytes, source_date_epoch)
-    elif fmt == "tar.gz":
-        bundle_path = directory / "bundle.tar.gz"
-        _write_tar_gz(bundle_path, files, manifest_bytes, source_date_epoch)
-    else:
+    if manifest_version not in {1, merkle.MANIFEST_VERSION}:
+        raise ValidationError("--manifest-version must be 1 or 2")
+    if fmt not in {"zip", "tar.gz"}:
         raise ValidationError("--format must be zip or tar.gz")
 
+    files = _sorted_payload_files(directory, include=include, exclude=exclude, symlinks=symlinks)
+    cache: dict[str, Any] | None = None
+    if incremental:
+        # A caller-owned hash_cache outlives this call: filled from disk once,
+        # then kept in step with every cache write.
+        if hash_cache is None:
+            cache = _load_hash_cache(directory)
+        else:
+            if not hash_cache:
+                hash_cache.update(_load_hash_cache(directory))
+            cache = hash_cache
+    bundle_path = directory / ("bundle.zip" if fmt == "zip" else "bundle.tar.gz")
+
+    # Cached records are known before any read; a member whose cached record
+    # matches the previous bundle is copied from it and never re-read.
+    records: dict[str, dict[str, Any]] = {}
+    reusable: dict[str, zipfile.ZipInfo] = {}
+    if cache is not None:
+        previous = _previous_zip_members(bundle_path, _zip_datetime(source_date_epoch)) if fmt == "zip" else {}
+        for rel, _, st in files:
+            record = _cached_record(rel, st, manifest_version, cache)
+            if record is None:
+                continue
+            records[rel] = record
+            known = previous.get(rel)
+            if known is not None and known[:2] == (record["size"], record["sha256"]):
+                reusable[rel] = known[2]
+
+    # Everything else is read exactly once: reader threads hash while the
+    # single writer appends members in sorted order as they become ready.
+    streams = pipeline.stream_files(
+        [(rel, abs_path, st.st_size) for rel, abs_path, st in files if rel not in reusable],
+        manifest_version=manifest_version,
+        workers=workers,
+    )
+    manifest: dict[str, Any] = {}
+
+    def finish() -> bytes:
+        ordered = [records[rel] for rel, _, _ in files]
+        manifest.update({"version": 1, "files": ordered} if manifest_version == 1 else merkle.build_manifest(ordered))
+        return (json.dumps(manifest, sort_keys=True, indent=2) + "\n").encode("utf-8")
+
+    def fresh(stream: pipeline.FileStream) -> None:
+        record = stream.record()
+        records[stream.rel] = record
+        if cache is not None:
+            _store_record(stream.rel, manifest_version, cache, record)
+
+    try:
+        if fmt == "zip":
+            _write_zip(bundle_path, files, streams, fresh, finish, source_date_epoch, reusable)
+        else:
+            _write_tar_gz(bundle_path, files, streams, fresh, finish, source_date_epoch)
+    finally:
+        streams.close()
+
+    if cache is not None:
+        _save_hash_cache(directory, cache)
+
     return bundle_path, manifest
 
 
+def directory_manifest(directory: Path) -> dict[str, Any]:
+    # The v1 manifest `package` would write for this tree, taking hashes from
+    # a valid .mwpack-cache.json where possible.  The cache is never written.
+    if not directory.is_dir():
+        raise ValidationError(f"package dir does not exist: {directory}")
+    cache = _load_hash_cache(directory)
+    records: list[dict[str, Any]] = []
+    for rel, abs_path, st in _sorted_payload_files(directory):
+        cached = _cached_record(rel, st, 1, cache) or _cached_record(rel, st, merkle.MANIFEST_VERSION, cache)
+        sha256 = cached["sha256"] if cached is not None else sha256_file(abs_path)
+        records.append({"path": rel, "size": st.st_size, "sha256": sha256})
+    return {"version": 1, "files": records}
+
+
 def checksum_for_bundle(path: Path) -> str:
     return sha256_file(path)
 
@@ -58,45 +140,321 @@ def checksum_for_manifest(manifest: dict[str, Any]) -> str:
     return sha256_bytes(raw)
 
 
-def _sorted_payload_files(directory: Path) -> list[tuple[str, Path]]:
-    out: list[tuple[str, Path]] = []
-    for path in directory.rglob("*"):
-        if not path.is_file():
-            continue
-        if path.name in _IGNORED_BUNDLE_NAMES:
-            continue
-        rel = path.relative_to(directory).as_posix()
-        out.append((rel, path))
+def _sorted_payload_files(
+    directory: Path,
+    *,
+    include: Iterable[str] = (),
+    exclude: Iterable[str] = (),
+    symlinks: str = "files",
+) -> list[PayloadFile]:
+    if symlinks not in SYMLINK_POLICIES:
+        raise ValidationError(f"symlink policy must be one of: {', '.join(SYMLINK_POLICIES)}")
+    includes = _compile_patterns(include)
+    excludes = _compile_patterns([*exclude, *_read_ignore_file(directory)])
+    track_dirs = symlinks == "all"
+    # Ancestor chain (not a global visited set) so cycles are cut deterministically.
+    root_key: frozenset[tuple[int, int]] = frozenset()
+    if track_dirs:
+        root_st = directory.stat()
+        root_key = frozenset({(root_st.st_dev, root_st.st_ino)})
+
+    out: list[PayloadFile] = []
+    stack: list[tuple[str, str, frozenset[tuple[int, int]]]] = [(str(directory), "", root_key)]
+    while stack:
+        current, prefix, ancestors = stack.pop()
+        with os.scandir(current) as entries:
+            for entry in entries:
+                rel = prefix + entry.name
+                is_link = entry.is_symlink()
+                if is_link and symlinks == "skip":
+                    continue
+                if is_link and symlinks == "error":
+                    raise ValidationError(f"symlink in package dir: {rel}")
+
+                if entry.is_dir():
+                    if is_link and not track_dirs:
+                        continue
+                    if _matches(rel, excludes, is_dir=True):
+                        continue
+                    chain = ancestors
+                    if track_dirs:
+                        st = entry.stat()
+                        key = (st.st_dev, st.st_ino)
+                        if key in ancestors:
+                            continue
+                        chain = ancestors | {key}
+                    stack.append((entry.path, rel + "/", chain))
+                    continue
+
+                if not entry.is_file() or entry.name in _IGNORED_BUNDLE_NAMES:
+                    continue
+                if _matches(rel, excludes, is_dir=False):
+                    continue
+                if includes and not _matches(rel, includes, is_dir=False):
+                    continue
+                out.append((rel, Path(entry.path), entry.stat()))
     out.sort(key=lambda x: x[0])
     return out
 
 
-def _write_zip(bundle_path: Path, files: list[tuple[str, Path]], manifest_bytes: bytes, source_date_epoch: int) -> None:
+def _read_ignore_file(directory: Path) -> list[str]:
+    try:
+        lines = (directory / IGNORE_FILE_NAME).read_text(encoding="utf-8").splitlines()
+    except FileNotFoundError:
+        return []
+    return [line.strip() for line in lines if line.strip() and not line.lstrip().startswith("#")]
+
+
+def _compile_patterns(patterns: Iterable[str]) -> list[tuple[str, bool, bool]]:
+    compiled: list[tuple[str, bool, bool]] = []
+    for raw in patterns:
+        dir_only = raw.endswith("/")
+        pattern = raw.strip("/")
+        if pattern:
+            compiled.append((pattern, "/" in raw.rstrip("/"), dir_only))
+    return compiled
+
+
+def _matches(rel: str, patterns: list[tuple[str, bool, bool]], *, is_dir: bool) -> bool:
+    name = rel.rpartition("/")[2]
+    for pattern, anchored, dir_only in patterns:
+        if dir_only and not is_dir:
+            continue
+        if fnmatch.fnmatchcase(rel if anchored else name, pattern):
+            return True
+    return False
+
+
+def _cached_record(
+    rel: str,
+    st: os.stat_result,
+    manifest_version: int,
+    cache: dict[str, Any],
+) -> dict[str, Any] | None:
+    signature = [st.st_size, st.st_mtime_ns, st.st_ino]
+    entry = cache["files"].get(rel)
+    if entry is None or entry["signature"] != signature:
+        entry = {"signature": signature, "records": {}}
+        cache["files"][rel] = entry
+    elif st.st_mtime_ns + _CACHE_SLACK_NS >= cache["written_ns"]:
+        entry["records"] = {}
+    return entry["records"].get(str(manifest_version))
+
+
+def _store_record(rel: str, manifest_version: int, cache: dict[str, Any], record: dict[str, Any]) -> None:
+    cache["files"][rel]["records"][str(manifest_version)] = record
+
+
+def _load_hash_cache(directory: Path) -> dict[str, Any]:
+    cache: dict[str, Any] = {"version": 1, "written_ns": 0, "files": {}}
+    try:
+        payload = json.loads((directory / HASH_CACHE_NAME).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return cache
+    if not isinstance(payload, dict) or payload.get("version") != 1 or not isinstance(payload.get("files"), dict):
+        return cache
+    written_ns = payload.get("written_ns")
+    if not isinstance(written_ns, int) or isinstance(written_ns, bool):
+        return cache
+    cache["written_ns"] = written_ns
+    # A malformed entry is a cache miss, never an error: `diff` reads this
+    # file but does not rewrite it, so it could not recover otherwise.
+    for rel, entry in payload["files"].items():
+        if not isinstance(entry, dict) or not _is_signature(entry.get("signature")):
+            continue
+        records = entry.get("records")
+        if not isinstance(records, dict):
+            continue
+        cache["files"][rel] = {
+            "signature": entry["signature"],
+            "records": {
+                version: record for version, record in records.items() if _is_record(rel, version, record)
+            },
+        }
+    return cache
+
+
+def _save_hash_cache(directory: Path, cache: dict[str, Any]) -> None:
+    # Merge rather than replace: entries for files this run filtered out stay
+    # valid, and only paths that no longer exist are dropped.
+    payload = {
+        "version": 1,
+        "written_ns": time.time_ns(),
+        "files": {rel: entry for rel, entry in cache["files"].items() if os.path.lexists(directory / rel)},
+    }
+    cache["written_ns"] = payload["written_ns"]
+    cache["files"] = payload["files"]
+    (directory / HASH_CACHE_NAME).write_text(json.dumps(payload, sort_keys=True) + "\n", encoding="utf-8")
+
+
+def _is_signature(value: Any) -> bool:
+    return isinstance(value, list) and len(value) == 3 and all(type(part) is int for part in value)
+
+
+def _is_record(rel: str, version: str, record: Any) -> bool:
+    if not isinstance(record, dict) or record.get("path") != rel:
+        return False
+    if type(record.get("size")) is not int or not isinstance(record.get("sha256"), str):
+        return False
+    if version == str(merkle.MANIFEST_VERSION):
+        return isinstance(record.get("chunks"), list) and isinstance(record.get("merkle_root"), str)
+    return version == "1"
+
+
+def _previous_zip_members(
+    bundle_path: Path,
+    dt: tuple[int, int, int, int, int, int],
+) -> dict[str, tuple[int, str, zipfile.ZipInfo]]:
+    if not bundle_path.is_file():
+        return {}
+    try:
+        with zipfile.ZipFile(bundle_path, "r") as zf:
+            previous = json.loads(zf.read("MANIFEST.json").decode("utf-8"))
+            infos = {info.filename: info for info in zf.infolist()}
+    except (OSError, KeyError, ValueError, zipfile.BadZipFile):
+        return {}
+
+    members: dict[str, tuple[int, str, zipfile.ZipInfo]] = {}
+    for entry in previous.get("files", []):
+        info = infos.get(entry["path"])
+        if info is None:
+            continue
+        if (
+            info.date_time == dt
+            and info.compress_type == zipfile.ZIP_STORED
+            and info.external_attr == _ZIP_EXTERNAL_ATTR
+            and info.file_size == entry["size"]
+            and info.compress_size == entry["size"]
+            and not info.flag_bits & 0x08
+            and not info.extra
+            and not info.comment
+        ):
+            members[entry["path"]] = (entry["size"], entry["sha256"], info)
+    return members
+
+
+def _write_zip(
+    bundle_path: Path,
+    files: list[PayloadFile],
+    streams: Iterator[pipeline.FileStream],
+    fresh: Callable[[pipeline.FileStream], None],
+    finish: Callable[[], bytes],
+    source_date_epoch: int,
+    reusable: dict[str, zipfile.ZipInfo],
+) -> None:
+    if reusable:
+        partial = bundle_path.with_name(f".{bundle_path.name}.partial")
+        try:
+            with bundle_path.open("rb") as source:
+                _write_zip_members(partial, files, streams, fresh, finish, source_date_epoch, reusable, source)
+            os.replace(partial, bundle_path)
+        finally:
+            partial.unlink(missing_ok=True)
+        return
+    _write_zip_members(bundle_path, files, streams, fresh, finish, source_date_epoch, {}, None)
+
+
+def _write_zip_members(
+    bundle_path: Path,
+    files: list[PayloadFile],
+    streams: Iterator[pipeline.FileStream],
+    fresh: Callable[[pipeline.FileStream], None],
+    finish: Callable[[], bytes],
+    source_date_epoch: int,
+    reusable: dict[str, zipfile.ZipInfo],
+    source: BinaryIO | None,
+) -> None:
     dt = _zip_datetime(source_date_epoch)
     with zipfile.ZipFile(bundle_path, mode="w", compression=zipfile.ZIP_STORED) as zf:
-        for rel, abs_path in files:
+        for rel, _, _ in files:
+            previous = reusable.get(rel)
+            if previous is not None and source is not None:
+                _copy_zip_member(zf, source, previous)
+                continue
+            stream = next(streams)
             info = zipfile.ZipInfo(rel)
             info.date_time = dt
             info.compress_type = zipfile.ZIP_STORED
-            info.external_attr = 0o100644 << 16
-            zf.writestr(info, abs_path.read_bytes())
+            info.external_attr = _ZIP_EXTERNAL_ATTR
+            # writestr() sets file_size up front too; it only picks zip64 headers.
+            info.file_size = stream.size
+            with zf.open(info, mode="w") as dest:
+                for chunk in stream:
+                    dest.write(chunk)
+            fresh(stream)
 
         manifest_info = zipfile.ZipInfo("MANIFEST.json")
         manifest_info.date_time = dt
         manifest_info.compress_type = zipfile.ZIP_STORED
-        manifest_info.external_attr = 0o100644 << 16
-        zf.writestr(manifest_info, manifest_bytes)
+        manifest_info.external_attr = _ZIP_EXTERNAL_ATTR
+        zf.writestr(manifest_info, finish())
+
+
+def _copy_zip_member(zf: zipfile.ZipFile, source: BinaryIO, info: zipfile.ZipInfo) -> None:
+    # Local headers carry no offsets, so header + data can be copied verbatim;
+    # only the central directory entry needs the new header_offset.
+    source.seek(info.header_offset)
+    header = source.read(zipfile.sizeFileHeader)
+    if len(header) != zipfile.sizeFileHeader or header[:4] != zipfile.stringFileHeader:
+        raise ValidationError(f"bad local header in existing bundle: {info.filename}")
+    name_len, extra_len = struct.unpack("<HH", header[26:30])
+    length = zipfile.sizeFileHeader + name_len + extra_len + info.compress_size
+
+    copied = copy.copy(info)
+    copied.header_offset = zf.start_dir
+    zf.fp.seek(zf.start_dir)
+    _copy_range(source, zf.fp, info.header_offset, length)
+    zf.filelist.append(copied)
+    zf.NameToInfo[copied.filename] = copied
+    zf.start_dir = copied.header_offset + length
+
+
+def _copy_range(source: BinaryIO, dest: IO[bytes], offset: int, length: int) -> None:
+    copy_file_range = getattr(os, "copy_file_range", None)
+    if copy_file_range is not None:
+        dest.flush()
+        position = dest.tell()
+        try:
+            while length:
+                done = copy_file_range(source.fileno(), dest.fileno(), length, offset, position)
+                if not done:
+                    break
+                offset += done
+                position += done
+                length -= done
+        except OSError:
+            pass
+        dest.seek(position)
+
+    source.seek(offset)
+    while length:
+        chunk = source.read(min(length, CHUNK_SIZE))
+        if not chunk:
+            raise ValidationError("existing bundle is truncated")
+        dest.write(chunk)
+        length -= len(chunk)
 
 
-def _write_tar_gz(bundle_path: Path, files: list[tuple[str, Path]], manifest_bytes: bytes, source_date_epoch: int) -> None:
+def _write_tar_gz(
+    bundle_path: Path,
+    files: list[PayloadFile],
+    streams: Iterator[pipeline.FileStream],
+    fresh: Callable[[pipeline.FileStream], None],
+    finish: Callable[[], bytes],
+    source_date_epoch: int,
+) -> None:
+    # One gzip stream keeps the output byte-identical; zlib releases the GIL,
+    # so compression here overlaps with the reader threads.
     with bundle_path.open("wb") as raw:
         with gzip.GzipFile(fileobj=raw, mode="wb", mtime=source_date_epoch) as gz:
             with tarfile.open(fileobj=gz, mode="w") as tf:
-                for rel, abs_path in files:
-                    payload = abs_path.read_bytes()
-                    info = _tar_info(rel, len(payload), source_date_epoch)
-                    tf.addfile(info, io.BytesIO(payload))
+                for _ in files:
+                    stream = next(streams)
+                    info = _tar_info(stream.rel, stream.size, source_date_epoch)
+                    tf.addfile(info, stream)
+                    fresh(stream)
 
+                manifest_bytes = finish()
                 manifest_info = _tar_info("MANIFEST.json", len(manifest_bytes), source_date_epoch)
                 tf.addfile(manifest_info, io.BytesIO(manifest_bytes))
 
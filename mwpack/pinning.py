@@ -0,0 +1,197 @@
+"""Security gate: third-party actions must be pinned to full 40-char commit SHAs."""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any
+
+from .errors import ValidationError
+from .hashing import sha256_bytes
+
+USES_PATTERN = re.compile(r"""^\s*(?:-\s+)?uses:\s*["']?([^\s#"']+)""")
+SHA_PATTERN = re.compile(r"^[0-9a-f]{40}$")
+WORKFLOW_SUFFIXES = (".yml", ".yaml")
+ACTION_NAMES = ("action.yml", "action.yaml")
+# Directories that never hold a repository's own composite actions.
+PRUNED_DIRS = frozenset({".git", "node_modules"})
+CACHE_VERSION = 2
+# Results for files no scan has seen in this long are dropped from the cache.
+CACHE_MAX_AGE_SECONDS = 30 * 24 * 3600
+
+_known: dict[str, list[dict[str, Any]]] = {}
+
+
+def scan_text(text: str) -> list[dict[str, Any]]:
+    findings: list[dict[str, Any]] = []
+    for idx, line in enumerate(text.splitlines(), start=1):
+        match = USES_PATTERN.match(line)
+        if not match:
+            continue
+
+        target = match.group(1)
+        if target.startswith("./") or target.startswith("docker://"):
+            continue
+
+        if "@" not in target:
+            findings.append({"line": idx, "uses": target, "reason": "missing_ref"})
+            continue
+
+        ref = target.rsplit("@", 1)[1]
+        if not SHA_PATTERN.fullmatch(ref):
+            findings.append({"line": idx, "uses": target, "reason": "not_sha"})
+    return findings
+
+
+def describe(finding: dict[str, Any]) -> str:
+    reason = "missing @ref in uses" if finding["reason"] == "missing_ref" else "not pinned to full SHA"
+    return f"{finding['file']}:{finding['line']}: {reason}: {finding['uses']}"
+
+
+def discover(repo: Path) -> list[Path]:
+    found: set[Path] = set()
+    workflows = repo / ".github" / "workflows"
+    if workflows.is_dir():
+        found.update(path for path in workflows.iterdir() if path.suffix in WORKFLOW_SUFFIXES and _scannable(path))
+
+    # Composite actions may live anywhere a `uses: ./path` can point.
+    for dirpath, dirnames, filenames in os.walk(repo):
+        dirnames[:] = [
+            name for name in dirnames if name not in PRUNED_DIRS and (name == ".github" or not name.startswith("."))
+        ]
+        for name in filenames:
+            if name in ACTION_NAMES and _scannable(Path(dirpath) / name):
+                found.add(Path(dirpath) / name)
+    return sorted(found)
+
+
+def scan_repo(repo: Path, known: dict[str, list[dict[str, Any]]]) -> dict[str, Any]:
+    # `known` maps a file's sha256 to its findings; identical workflows across
+    # mirrors, or unchanged since the last run, are hashed but never re-parsed.
+    files: list[dict[str, Any]] = []
+    findings: list[dict[str, Any]] = []
+    errors: list[dict[str, Any]] = []
+    fresh: dict[str, list[dict[str, Any]]] = {}
+    cached = 0
+    for path in discover(repo):
+        rel = path.relative_to(repo).as_posix()
+        try:
+            data = path.read_bytes()
+        except OSError as exc:
+            # Unreadable files fail this repo's report, not the whole run.
+            errors.append({"file": rel, "error": exc.strerror or str(exc)})
+            continue
+        digest = sha256_bytes(data)
+        result = known.get(digest, fresh.get(digest))
+        if result is None:
+            result = fresh[digest] = scan_text(data.decode("utf-8", errors="replace"))
+        else:
+            cached += 1
+        files.append({"path": rel, "sha256": digest})
+        findings.extend({"file": rel, **finding} for finding in result)
+    return {
+        "repo": str(repo),
+        "files": files,
+        "cached": cached,
+        "findings": findings,
+        "errors": errors,
+        "new_results": fresh,
+    }
+
+
+def scan_repos(
+    repos: list[Path],
+    *,
+    workers: int | None = None,
+    cache_path: Path | None = None,
+) -> dict[str, Any]:
+    for repo in repos:
+        if not repo.is_dir():
+            raise ValidationError(f"repository does not exist: {repo}")
+
+    entries = load_cache(cache_path) if cache_path is not None else {}
+    cache = {digest: entry["findings"] for digest, entry in entries.items()}
+    workers = max(1, min(workers or os.cpu_count() or 1, len(repos)))
+    tasks = [repo.resolve() for repo in repos]
+
+    reports: list[dict[str, Any]] = []
+    # The cache reaches each worker once, through the initializer, not per repo.
+    pool = ProcessPoolExecutor(max_workers=workers, initializer=_set_known, initargs=(cache,)) if workers > 1 else None
+    try:
+        if pool is None:
+            _set_known(cache)
+        results = pool.map(_scan_task, tasks) if pool is not None else map(_scan_task, tasks)
+        for report in results:
+            cache.update(report.pop("new_results"))
+            reports.append(report)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    if cache_path is not None:
+        # Merge rather than replace: a run over a subset of mirrors keeps the
+        # others' results, and only entries unseen for CACHE_MAX_AGE_SECONDS go.
+        now = int(time.time())
+        for report in reports:
+            for entry in report["files"]:
+                entries[entry["sha256"]] = {"findings": cache[entry["sha256"]], "seen": now}
+        cutoff = now - CACHE_MAX_AGE_SECONDS
+        save_cache(cache_path, {digest: entry for digest, entry in entries.items() if entry["seen"] >= cutoff})
+
+    return {
+        "ok": not any(report["findings"] or report["errors"] for report in reports),
+        "workers": workers,
+        "files": sum(len(report["files"]) for report in reports),
+        "cached": sum(report["cached"] for report in reports),
+        "findings": sum(len(report["findings"]) for report in reports),
+        "errors": sum(len(report["errors"]) for report in reports),
+        "repos": reports,
+    }
+
+
+def load_cache(path: Path) -> dict[str, dict[str, Any]]:
+    # sha256 -> {"findings": [...], "seen": unix time of the last scan that had it}
+    try:
+        payload = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(payload, dict) or payload.get("version") != CACHE_VERSION:
+        return {}
+    results = payload.get("results")
+    if not isinstance(results, dict):
+        return {}
+    return {
+        digest: entry
+        for digest, entry in results.items()
+        if isinstance(entry, dict) and isinstance(entry.get("findings"), list) and isinstance(entry.get("seen"), int)
+    }
+
+
+def save_cache(path: Path, results: dict[str, dict[str, Any]]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps({"version": CACHE_VERSION, "results": results}, sort_keys=True) + "\n", encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def _scannable(path: Path) -> bool:
+    # Regular files, plus dangling symlinks so they are reported, not skipped;
+    # FIFOs and other special files would block or make no sense to read.
+    return path.is_file() or (path.is_symlink() and not path.exists())
+
+
+def _set_known(known: dict[str, list[dict[str, Any]]]) -> None:
+    global _known
+    _known = known
+
+
+def _scan_task(repo: Path) -> dict[str, Any]:
+    try:
+        return scan_repo(repo, _known)
+    except OSError as exc:
+        error = {"file": ".", "error": exc.strerror or str(exc)}
+        return {"repo": str(repo), "files": [], "cached": 0, "findings": [], "errors": [error], "new_results": {}}
@@ -0,0 +1,144 @@
+"""Bounded read/hash pipeline feeding an ordered archive writer."""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import queue
+import threading
+from collections import deque
+from collections.abc import Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any
+
+from . import merkle
+from .errors import ValidationError
+
+CHUNK_SIZE = merkle.CHUNK_SIZE
+QUEUE_CHUNKS = 4
+MAX_WORKERS = 8
+_DONE = object()
+_POLL_SECONDS = 0.1
+
+
+class FileStream:
+    # One file's chunks, produced by a reader thread and consumed in order by
+    # the writer; `record()` is available once the stream is drained.  The
+    # reader delivers exactly `size` bytes or fails, so headers written up
+    # front from `size` always match the data and the manifest record.
+
+    def __init__(self, rel: str, size: int, chunks: queue.Queue[Any], future: Future[dict[str, Any]]) -> None:
+        self.rel = rel
+        self.size = size
+        self._chunks = chunks
+        self._future = future
+        self._pending = b""
+        self._finished = False
+
+    def __iter__(self) -> Iterator[bytes]:
+        if self._pending:
+            pending, self._pending = self._pending, b""
+            yield pending
+        while not self._finished:
+            chunk = self._chunks.get()
+            if chunk is _DONE:
+                self._finished = True
+                self._future.result()
+                return
+            yield chunk
+
+    def read(self, size: int = -1) -> bytes:
+        parts: list[bytes] = []
+        wanted = size if size >= 0 else None
+        for chunk in self:
+            if wanted is not None and len(chunk) >= wanted:
+                parts.append(chunk[:wanted])
+                self._pending = chunk[wanted:]
+                return b"".join(parts)
+            parts.append(chunk)
+            if wanted is not None:
+                wanted -= len(chunk)
+        return b"".join(parts)
+
+    def record(self) -> dict[str, Any]:
+        for _ in self:
+            pass
+        return self._future.result()
+
+
+def stream_files(
+    jobs: list[tuple[str, Path, int]],
+    *,
+    manifest_version: int,
+    workers: int | None = None,
+) -> Iterator[FileStream]:
+    # Reader threads hash while they read (hashlib drops the GIL on large
+    # updates), each file's chunks wait in a bounded queue, and at most
+    # `window` files are in flight, so memory stays near
+    # window * QUEUE_CHUNKS * CHUNK_SIZE however large the tree is.  Tasks
+    # start in submission order, so the file the writer waits on is always
+    # running or finished and the pipeline cannot deadlock.
+    workers = max(1, min(workers or os.cpu_count() or 1, MAX_WORKERS))
+    window = workers * 2
+    stop = threading.Event()
+    pending: deque[FileStream] = deque()
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="mwpack-read")
+    try:
+        submitted = 0
+        while submitted < len(jobs) or pending:
+            while submitted < len(jobs) and len(pending) < window:
+                rel, path, size = jobs[submitted]
+                chunks: queue.Queue[Any] = queue.Queue(maxsize=QUEUE_CHUNKS)
+                future = executor.submit(_read_file, rel, path, size, chunks, stop, manifest_version)
+                pending.append(FileStream(rel, size, chunks, future))
+                submitted += 1
+            stream = pending.popleft()
+            yield stream
+            stream.record()
+    finally:
+        stop.set()
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def _read_file(
+    rel: str,
+    path: Path,
+    expected: int,
+    chunks: queue.Queue[Any],
+    stop: threading.Event,
+    manifest_version: int,
+) -> dict[str, Any]:
+    whole = hashlib.sha256()
+    leaves: list[str] = []
+    size = 0
+    try:
+        with path.open("rb") as handle:
+            while chunk := handle.read(CHUNK_SIZE):
+                # Checked before the chunk is queued: a file that grew since
+                # the scan never leaks bytes past its header's size.
+                if size + len(chunk) > expected:
+                    raise ValidationError(f"file changed while packaging: {rel}")
+                whole.update(chunk)
+                if manifest_version != 1:
+                    leaves.append(merkle.leaf_hash(chunk))
+                size += len(chunk)
+                if not _put(chunks, chunk, stop):
+                    return {}
+        if size != expected:
+            raise ValidationError(f"file changed while packaging: {rel}")
+    finally:
+        _put(chunks, _DONE, stop)
+    if manifest_version == 1:
+        return {"path": rel, "size": size, "sha256": whole.hexdigest()}
+    return merkle.chunked_record(rel, size, whole.hexdigest(), leaves)
+
+
+def _put(chunks: queue.Queue[Any], item: Any, stop: threading.Event) -> bool:
+    while not stop.is_set():
+        try:
+            chunks.put(item, timeout=_POLL_SECONDS)
+            return True
+        except queue.Full:
+            continue
+    return False
@@ -0,0 +1,173 @@
+"""Rebuild recorded artifact directories in isolation and compare their hashes."""
+
+from __future__ import annotations
+
+import json
+import os
+import tarfile
+import tempfile
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any
+
+from . import build, diff, package, schema
+from .errors import MWPackError, ValidationError
+from .hashing import sha256_file
+
+BUNDLE_NAMES = {"bundle.zip": "zip", "bundle.tar.gz": "tar.gz"}
+
+
+def reproduce(directories: list[Path], *, workers: int | None = None) -> dict[str, Any]:
+    if not directories:
+        raise ValidationError("reproduce requires at least one directory")
+    workers = max(1, min(workers or os.cpu_count() or 1, len(directories)))
+    tasks = [str(directory) for directory in directories]
+
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        results = list(pool.map(reproduce_dir, tasks) if pool is not None else map(reproduce_dir, tasks))
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    return {
+        "ok": all(result["ok"] for result in results),
+        "workers": workers,
+        "artifacts": results,
+    }
+
+
+def reproduce_dir(directory: str) -> dict[str, Any]:
+    # One artifact per task; errors are reported per directory, so a single
+    # broken artifact does not hide the verdicts for the rest of the batch.
+    try:
+        result = _reproduce(Path(directory))
+    except (MWPackError, OSError) as exc:
+        return {"dir": directory, "ok": False, "error": str(exc), "checks": {}, "first_divergence": None}
+    result["dir"] = directory
+    return result
+
+
+def config_from_report(report: dict[str, Any]) -> list[dict[str, Any]] | None:
+    # The report's inputs are the validated config minus it_cap_w and the
+    # mixed-SKU objective, which is not recorded; each objective is a candidate.
+    inputs = report.get("inputs")
+    if not isinstance(inputs, dict) or "fabric" not in inputs:
+        return None
+    config: dict[str, Any] = {"it_cap_w": report["it_cap_w"], **inputs}
+    if "node" in config:
+        return [config]
+    config["nodes"] = [{key: value for key, value in sku.items() if value is not None} for sku in config["nodes"]]
+    return [{**config, "objective": objective} for objective in schema.OBJECTIVES]
+
+
+def first_divergent_member(recorded: Path, rebuilt: Path) -> str | None:
+    before = {entry["path"]: entry for entry in diff.read_manifest(recorded)["files"]}
+    after = {entry["path"]: entry for entry in diff.read_manifest(rebuilt)["files"]}
+    for path in sorted(before.keys() | after.keys()):
+        if before.get(path) != after.get(path):
+            return path
+
+    # Same payload: the difference is in archive metadata or MANIFEST.json.
+    for old, new in zip(_archive_entries(recorded), _archive_entries(rebuilt)):
+        if old != new:
+            return old[0]
+    return None
+
+
+def _reproduce(directory: Path) -> dict[str, Any]:
+    summary_path = directory / "build_summary.json"
+    try:
+        recorded = json.loads(summary_path.read_text(encoding="utf-8"))
+        report = json.loads((directory / "cluster_report.json").read_text(encoding="utf-8"))
+        expected = {
+            "memo.md": recorded["sha256"]["memo"],
+            "cluster_report.json": recorded["sha256"]["report"],
+            "build_summary.json": sha256_file(summary_path),
+        }
+        name, epoch, version, paths = (
+            recorded["artifact_name"],
+            recorded["source_date_epoch"],
+            recorded["tool_version"],
+            recorded["paths"],
+        )
+        if not isinstance(report, dict) or "it_cap_w" not in report:
+            raise ValueError("cluster_report.json is not a report object")
+        candidates = config_from_report(report)
+    except (OSError, ValueError, KeyError, TypeError, AttributeError) as exc:
+        raise ValidationError(f"not a recorded build: {directory} ({exc})") from exc
+
+    bundles = {fname: fmt for fname, fmt in BUNDLE_NAMES.items() if (directory / fname).is_file()}
+
+    with tempfile.TemporaryDirectory(prefix="mwpack-reproduce-") as tmp:
+        tmpdir = Path(tmp)
+        actual: dict[str, str] = {}
+        for candidate in candidates or [None]:
+            config_path = None
+            if candidate is not None:
+                config_path = tmpdir / "config.json"
+                config_path.write_text(build.to_json(candidate), encoding="utf-8")
+            # The recorded memo.md is already normalized, and normalizing is
+            # idempotent, so it stands in for the original source.
+            out_dir, rebuilt = build.build_artifacts(
+                directory / "memo.md",
+                config_path,
+                out=tmpdir / "out",
+                name=name,
+                source_date_epoch=epoch,
+                cache={"tool_version": version},
+                keep=1,
+                background_gc=False,
+            )
+            actual = {
+                "memo.md": rebuilt["sha256"]["memo"],
+                "cluster_report.json": rebuilt["sha256"]["report"],
+            }
+            if actual["cluster_report.json"] == expected["cluster_report.json"]:
+                break
+
+        # Paths name the recorded output directory, not the scratch one.
+        rebuilt["paths"] = paths
+        (out_dir / "build_summary.json").write_text(build.to_json(rebuilt), encoding="utf-8")
+        actual["build_summary.json"] = sha256_file(out_dir / "build_summary.json")
+
+        checks = {
+            member: {"expected": expected[member], "actual": actual[member], "ok": expected[member] == actual[member]}
+            for member in expected
+        }
+        first = next((member for member, check in checks.items() if not check["ok"]), None)
+
+        for fname, fmt in bundles.items():
+            manifest_version = diff.read_manifest(directory / fname).get("version", 1)
+            bundle, _ = package.create_bundle(
+                out_dir,
+                fmt=fmt,
+                source_date_epoch=epoch,
+                manifest_version=manifest_version,
+            )
+            want, got = sha256_file(directory / fname), sha256_file(bundle)
+            checks[fname] = {"expected": want, "actual": got, "ok": want == got}
+            if want != got and first is None:
+                member = first_divergent_member(directory / fname, bundle)
+                first = f"{fname}:{member}" if member is not None else fname
+
+    return {
+        "ok": first is None,
+        "checks": checks,
+        "first_divergence": first,
+    }
+
+
+def _archive_entries(path: Path) -> list[tuple[Any, ...]]:
+    if diff.source_kind(path) == "zip":
+        with zipfile.ZipFile(path, "r") as zf:
+            return [
+                (info.filename, info.date_time, info.CRC, info.file_size, info.compress_type, info.external_attr)
+                for info in zf.infolist()
+            ]
+    with tarfile.open(path, "r:gz") as tf:
+        return [
+            (member.name, member.mtime, member.mode, member.size, member.uid, member.gid, member.uname, member.gname)
+            for member in tf
+        ]
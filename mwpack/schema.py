@@ -9,6 +9,8 @@ from typing import Any
 from .errors import ValidationError
 
 MARKDOWN_SUFFIXES = {".md", ".markdown", ".mdown"}
+OBJECTIVES = ("weighted_gpus", "nodes")
+CONSTRAINT_KEYS = ("max_oversubscription", "max_leaves", "max_spines", "max_optics")
 
 
 def validate_memo_path(path: Path) -> None:
@@ -35,14 +37,17 @@ def validate_cluster_config(payload: Any) -> dict[str, Any]:
 
     it_cap_w = _require_number(payload, "it_cap_w", positive=True)
 
-    node = _require_object(payload, "node")
-    gpu_count = _require_int(node, "gpu_count", minimum=1)
-    gpu_power_w = _require_number(node, "gpu_power_w", positive=True)
-    cpu_power_w = _require_number(node, "cpu_power_w", positive=True)
-    baseboard_power_w = _require_number(node, "baseboard_power_w", positive=True)
-    nic_power_w = _require_number(node, "nic_power_w", positive=True)
-    storage_power_w = _require_number(node, "storage_power_w", positive=True)
-    other_power_w = _require_number(node, "other_power_w", minimum=0)
+    node: dict[str, Any] | None = None
+    node_types: list[dict[str, Any]] | None = None
+    if "nodes" in payload:
+        if "node" in payload:
+            raise ValidationError("config must define node or nodes, not both")
+        node_types = _validate_node_types(payload)
+        objective = payload.get("objective", "weighted_gpus")
+        if objective not in OBJECTIVES:
+            raise ValidationError(f"objective must be one of: {', '.join(OBJECTIVES)}")
+    else:
+        node = _validate_node(_require_object(payload, "node"))
 
     fabric = _require_object(payload, "fabric")
     host_ports_per_node = _require_int(fabric, "host_ports_per_node", minimum=1)
@@ -67,34 +72,96 @@ def validate_cluster_config(payload: Any) -> dict[str, Any]:
     if leaf_host_ports % host_ports_per_node != 0:
         raise ValidationError("leaf.host_ports must be divisible by host_ports_per_node")
 
-    return {
-        "it_cap_w": it_cap_w,
-        "node": {
-            "gpu_count": gpu_count,
-            "gpu_power_w": gpu_power_w,
-            "cpu_power_w": cpu_power_w,
-            "baseboard_power_w": baseboard_power_w,
-            "nic_power_w": nic_power_w,
-            "storage_power_w": storage_power_w,
-            "other_power_w": other_power_w,
+    constraints = _validate_constraints(payload["constraints"]) if "constraints" in payload else None
+    rack = _validate_rack(_require_object(payload, "rack")) if "rack" in payload else None
+
+    validated: dict[str, Any] = {"it_cap_w": it_cap_w}
+    if node_types is not None:
+        validated["nodes"] = node_types
+        validated["objective"] = objective
+    else:
+        validated["node"] = node
+    validated["fabric"] = {
+        "host_ports_per_node": host_ports_per_node,
+        "host_link_gbps": host_link_gbps,
+        "uplink_gbps": uplink_gbps,
+        "optics_power_w_per_uplink": optics_power_w_per_uplink,
+        "leaf": {
+            "ports": leaf_ports,
+            "host_ports": leaf_host_ports,
+            "uplink_ports": leaf_uplink_ports,
+            "power_w": leaf_power_w,
         },
-        "fabric": {
-            "host_ports_per_node": host_ports_per_node,
-            "host_link_gbps": host_link_gbps,
-            "uplink_gbps": uplink_gbps,
-            "optics_power_w_per_uplink": optics_power_w_per_uplink,
-            "leaf": {
-                "ports": leaf_ports,
-                "host_ports": leaf_host_ports,
-                "uplink_ports": leaf_uplink_ports,
-                "power_w": leaf_power_w,
-            },
-            "spine": {
-                "ports": spine_ports,
-                "power_w": spine_power_w,
-            },
+        "spine": {
+            "ports": spine_ports,
+            "power_w": spine_power_w,
         },
     }
+    if constraints is not None:
+        validated["constraints"] = constraints
+    if rack is not None:
+        validated["rack"] = rack
+    return validated
+
+
+def _validate_node(node: dict[str, Any]) -> dict[str, Any]:
+    return {
+        "gpu_count": _require_int(node, "gpu_count", minimum=1),
+        "gpu_power_w": _require_number(node, "gpu_power_w", positive=True),
+        "cpu_power_w": _require_number(node, "cpu_power_w", positive=True),
+        "baseboard_power_w": _require_number(node, "baseboard_power_w", positive=True),
+        "nic_power_w": _require_number(node, "nic_power_w", positive=True),
+        "storage_power_w": _require_number(node, "storage_power_w", positive=True),
+        "other_power_w": _require_number(node, "other_power_w", minimum=0),
+    }
+
+
+def _validate_node_types(payload: dict[str, Any]) -> list[dict[str, Any]]:
+    raw = payload["nodes"]
+    if not isinstance(raw, list) or not raw:
+        raise ValidationError("nodes must be a non-empty array")
+
+    out: list[dict[str, Any]] = []
+    seen: set[str] = set()
+    for item in raw:
+        if not isinstance(item, dict):
+            raise ValidationError("nodes entries must be objects")
+        name = item.get("name")
+        if not isinstance(name, str) or not name:
+            raise ValidationError("nodes entries require a non-empty name")
+        if name in seen:
+            raise ValidationError(f"duplicate node type name: {name}")
+        seen.add(name)
+
+        sku = {"name": name, **_validate_node(item)}
+        sku["weight"] = _require_number(item, "weight", positive=True) if "weight" in item else 1.0
+        sku["max_count"] = _require_int(item, "max_count", minimum=0) if "max_count" in item else None
+        out.append(sku)
+    return out
+
+
+def _validate_constraints(raw: Any) -> dict[str, Any]:
+    if not isinstance(raw, dict):
+        raise ValidationError("constraints must be an object")
+    unknown = sorted(set(raw) - set(CONSTRAINT_KEYS))
+    if unknown:
+        raise ValidationError(f"unsupported constraint: {unknown[0]}")
+
+    out: dict[str, Any] = {}
+    if "max_oversubscription" in raw:
+        out["max_oversubscription"] = _require_number(raw, "max_oversubscription", positive=True)
+    for key in ("max_leaves", "max_spines", "max_optics"):
+        if key in raw:
+            out[key] = _require_int(raw, key, minimum=0)
+    return out
+
+
+def _validate_rack(rack: dict[str, Any]) -> dict[str, Any]:
+    return {
+        "power_cap_w": _require_number(rack, "power_cap_w", positive=True),
+        "slots": _require_int(rack, "slots", minimum=1),
+        "leaves_per_rack": _require_int(rack, "leaves_per_rack", minimum=1) if "leaves_per_rack" in rack else 1,
+    }
 
 
 def _require_object(payload: dict[str, Any], key: str) -> dict[str, Any]:
@@ -0,0 +1,90 @@
+"""Streaming solves over time-varying power-cap traces (CSV or JSONL)."""
+
+from __future__ import annotations
+
+import csv
+import itertools
+import json
+import math
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any, TextIO
+
+from . import model
+from .errors import ValidationError
+
+TRACE_FORMATS = ("csv", "jsonl")
+
+
+def trace_format(
+    path: Path,
+    explicit: str | None = None,
+    *,
+    kind: str = "trace",
+    flag: str = "--trace-format",
+) -> str:
+    if explicit is not None:
+        return explicit
+    suffix = path.suffix.lower()
+    if suffix == ".csv":
+        return "csv"
+    if suffix in {".jsonl", ".ndjson"}:
+        return "jsonl"
+    raise ValidationError(f"cannot infer {kind} format from suffix (use {flag}): {path}")
+
+
+def iter_caps(handle: TextIO, fmt: str) -> Iterator[tuple[Any, float]]:
+    if fmt == "csv":
+        reader = csv.DictReader(handle)
+        if reader.fieldnames is None or "it_cap_w" not in reader.fieldnames:
+            raise ValidationError("trace CSV must have an it_cap_w column")
+        for row in reader:
+            yield row.get("timestamp"), _cap(row["it_cap_w"], reader.line_num)
+    elif fmt == "jsonl":
+        for line_num, line in enumerate(handle, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError as exc:
+                raise ValidationError(f"trace line {line_num} is not valid JSON: {exc}") from exc
+            if not isinstance(row, dict) or "it_cap_w" not in row:
+                raise ValidationError(f"trace line {line_num} must be an object with it_cap_w")
+            yield row.get("timestamp"), _cap(row["it_cap_w"], line_num)
+    else:
+        raise ValidationError(f"trace format must be one of: {', '.join(TRACE_FORMATS)}")
+
+
+def solve_trace(config: dict[str, Any], rows: Iterator[tuple[Any, float]]) -> Iterator[dict[str, Any]]:
+    if "node" not in config:
+        raise ValidationError("trace solve requires a single node config")
+
+    fabric = config["fabric"]
+    gpu_count = config["node"]["gpu_count"]
+    # tee lags by one row, so memory stays constant however long the trace is.
+    for_caps, for_meta = itertools.tee(rows)
+    solved = model.max_nodes_trace(config, (cap for _, cap in for_caps))
+    for index, ((timestamp, cap), (nodes, p_total_w)) in enumerate(zip(for_meta, solved)):
+        leaves, _, spines = model.fabric_counts(fabric, nodes * fabric["host_ports_per_node"])
+        record: dict[str, Any] = {
+            "index": index,
+            "it_cap_w": cap,
+            "nodes": nodes,
+            "gpus": nodes * gpu_count,
+            "leaves": leaves,
+            "spines": spines,
+            "p_total_w": p_total_w,
+        }
+        if timestamp is not None:
+            record["timestamp"] = timestamp
+        yield record
+
+
+def _cap(value: Any, line_num: int) -> float:
+    try:
+        cap = float(value)
+    except (TypeError, ValueError) as exc:
+        raise ValidationError(f"trace line {line_num}: it_cap_w must be numeric") from exc
+    if not cap >= 0 or not math.isfinite(cap):
+        raise ValidationError(f"trace line {line_num}: it_cap_w must be a finite number >= 0")
+    return cap
@@ -0,0 +1,122 @@
+"""Change detection for `build --watch` (inotify when available, stat polling otherwise)."""
+
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import os
+import select
+import sys
+import time
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+
+Signature = tuple[int, int, int] | None
+
+_IN_MODIFY = 0x00000002
+_IN_ATTRIB = 0x00000004
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_MASK = (
+    _IN_MODIFY | _IN_ATTRIB | _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE
+)
+
+
+def snapshot(paths: Iterable[Path]) -> dict[Path, Signature]:
+    out: dict[Path, Signature] = {}
+    for path in paths:
+        try:
+            st = path.stat()
+        except OSError:
+            out[path] = None
+            continue
+        out[path] = (st.st_mtime_ns, st.st_size, st.st_ino)
+    return out
+
+
+def iter_changes(
+    paths: Iterable[Path],
+    *,
+    interval: float = 0.05,
+    debounce: float = 0.05,
+    use_inotify: bool = True,
+) -> Iterator[set[Path]]:
+    watched = sorted({path.resolve() for path in paths})
+    notifier = _Inotify.open({path.parent for path in watched}) if use_inotify else None
+    # With inotify the timeout is only a safety net for missed events.
+    timeout = max(interval, 1.0) if notifier is not None else interval
+    try:
+        previous = snapshot(watched)
+        while True:
+            _wait(notifier, timeout)
+            current = snapshot(watched)
+            changed = _diff(previous, current)
+            if not changed:
+                continue
+            while True:
+                _wait(notifier, debounce)
+                settled = snapshot(watched)
+                more = _diff(current, settled)
+                if not more:
+                    break
+                changed |= more
+                current = settled
+            previous = current
+            yield changed
+    finally:
+        if notifier is not None:
+            notifier.close()
+
+
+def _diff(before: dict[Path, Signature], after: dict[Path, Signature]) -> set[Path]:
+    return {path for path, sig in after.items() if before.get(path) != sig}
+
+
+def _wait(notifier: _Inotify | None, timeout: float) -> None:
+    if notifier is None:
+        time.sleep(timeout)
+        return
+    ready, _, _ = select.select([notifier.fd], [], [], timeout)
+    if ready:
+        notifier.drain()
+
+
+class _Inotify:
+    def __init__(self, fd: int) -> None:
+        self.fd = fd
+
+    @classmethod
+    def open(cls, directories: Iterable[Path]) -> _Inotify | None:
+        if not sys.platform.startswith("linux"):
+            return None
+        name = ctypes.util.find_library("c")
+        try:
+            libc = ctypes.CDLL(name, use_errno=True)
+            init = libc.inotify_init1
+            add_watch = libc.inotify_add_watch
+        except (OSError, AttributeError):
+            return None
+
+        fd = init(os.O_NONBLOCK | os.O_CLOEXEC)
+        if fd < 0:
+            return None
+        for directory in directories:
+            if add_watch(fd, os.fsencode(directory), _IN_MASK) < 0:
+                os.close(fd)
+                return None
+        return cls(fd)
+
+    def drain(self) -> None:
+        # Events are only a wake-up signal; stat snapshots decide what changed.
+        while True:
+            try:
+                if not os.read(self.fd, 64 * 1024):
+                    return
+            except BlockingIOError:
+                return
+
+    def close(self) -> None:
+        os.close(self.fd)
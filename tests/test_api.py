@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from mwpack import api, model, package
+from mwpack.errors import ValidationError
+
+ROOT = Path(__file__).resolve().parents[1]
+CONFIG = ROOT / "tools" / "example_5mw_config.json"
+
+
+class SessionTests(unittest.TestCase):
+    def test_solve_is_cached_per_config(self) -> None:
+        session = api.Session()
+        with mock.patch("mwpack.api.model.solve_cluster", wraps=model.solve_cluster) as solve:
+            first = session.solve(CONFIG)
+            second = session.solve(CONFIG)
+        self.assertEqual(solve.call_count, 1)
+        self.assertIsInstance(first, api.SolveResult)
+        self.assertEqual(first, second)
+        self.assertEqual(first.nodes, first.report["nodes"])
+
+        first.report["nodes"] = -1
+        self.assertNotEqual(session.solve(CONFIG).nodes, -1)
+
+    def test_config_cache_follows_file_changes(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "config.json"
+            payload = json.loads(CONFIG.read_text(encoding="utf-8"))
+            path.write_text(json.dumps(payload), encoding="utf-8")
+            session = api.Session()
+            before = session.solve(path).nodes
+
+            payload["it_cap_w"] = payload["it_cap_w"] * 2
+            path.write_text(json.dumps(payload, indent=1), encoding="utf-8")
+            self.assertGreater(session.solve(path).nodes, before)
+
+            with self.assertRaises(ValidationError):
+                session.load_config(Path(tmp) / "missing.json")
+
+    def test_build_package_and_diff(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            memo = Path(tmp) / "memo.md"
+            memo.write_text("# memo\n", encoding="utf-8")
+            session = api.Session(source_date_epoch=1_700_000_000)
+
+            built = session.build(memo, config=CONFIG, out=Path(tmp) / "out")
+            self.assertIsInstance(built, api.BuildResult)
+            self.assertEqual(json.loads(built.report.read_text(encoding="utf-8")), session.solve(CONFIG).report)
+            self.assertEqual(built.summary["source_date_epoch"], 1_700_000_000)
+
+            for path in built.out_dir.iterdir():
+                os.utime(path, ns=(1_600_000_000_000_000_000, 1_600_000_000_000_000_000))
+            with mock.patch("mwpack.package._load_hash_cache", wraps=package._load_hash_cache) as load:
+                plain = session.package(built.out_dir)
+                self.assertFalse((built.out_dir / package.HASH_CACHE_NAME).exists())
+                first = session.package(built.out_dir, incremental=True)
+                second = session.package(built.out_dir, incremental=True)
+            self.assertEqual(load.call_count, 1)
+            self.assertEqual(plain.sha256, first.sha256)
+            self.assertEqual(first.sha256, second.sha256)
+            self.assertEqual(first.files, 3)
+
+            changes = session.diff(first.bundle, built.out_dir)
+            self.assertEqual((changes.added, changes.removed, changes.changed), ([], [], []))
+            self.assertEqual(changes.unchanged, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+import copy
+import io
+import json
+import random
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from mwpack import calibrate, cli, schema
+from mwpack.errors import ValidationError
+from tests.test_model import BASE_CONFIG
+
+TRUE_NODE = {
+    "gpu_power_w": 650.0,
+    "cpu_power_w": 300.0,
+    "baseboard_power_w": 110.0,
+    "nic_power_w": 70.0,
+    "storage_power_w": 50.0,
+    "other_power_w": 90.0,
+}
+
+
+def synthetic_rows(count: int, seed: int = 5) -> list[dict[str, object]]:
+    rng = random.Random(seed)
+    rows: list[dict[str, object]] = []
+    for i in range(count):
+        gpus = rng.choice([4, 6, 8])
+        readings = {key: value + rng.gauss(0, 2) for key, value in TRUE_NODE.items() if key != "gpu_power_w"}
+        power = gpus * (TRUE_NODE["gpu_power_w"] + rng.gauss(0, 3)) + sum(readings.values())
+        row: dict[str, object] = {"kind": "node", "gpus": gpus, "power_w": power}
+        # Only some nodes report component readings; other_power_w never does.
+        if i % 3 == 0:
+            row.update({key: value for key, value in readings.items() if key != "other_power_w"})
+        rows.append(row)
+        if i % 10 == 0:
+            rows.append({"kind": "leaf", "power_w": 420 + rng.gauss(0, 5)})
+            rows.append({"kind": "spine", "power_w": 530 + rng.gauss(0, 5)})
+            rows.append({"kind": "optics", "power_w": 12 + rng.gauss(0, 0.5)})
+    return rows
+
+
+def as_jsonl(rows: list[dict[str, object]]) -> str:
+    return "".join(json.dumps(row) + "\n" for row in rows)
+
+
+class CalibrateTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.config = schema.validate_cluster_config(copy.deepcopy(BASE_CONFIG))
+
+    def test_recovers_coefficients(self) -> None:
+        rows = synthetic_rows(3000)
+        samples = calibrate.iter_samples(io.StringIO(as_jsonl(rows)), "jsonl")
+        calibrated, summary = calibrate.calibrate(self.config, samples)
+
+        node = calibrated["node"]
+        for key, expected in TRUE_NODE.items():
+            self.assertAlmostEqual(node[key], expected, delta=2.0, msg=key)
+        self.assertAlmostEqual(calibrated["fabric"]["leaf"]["power_w"], 420, delta=1.0)
+        self.assertAlmostEqual(calibrated["fabric"]["spine"]["power_w"], 530, delta=1.0)
+        self.assertAlmostEqual(calibrated["fabric"]["optics_power_w_per_uplink"], 12, delta=0.2)
+        self.assertEqual(summary["rows"], {"node": 3000, "leaf": 300, "spine": 300, "optics": 300})
+        self.assertEqual(summary["clamped"], [])
+        self.assertLess(summary["node_rmse_w"], 30)
+        self.assertEqual(schema.validate_cluster_config(calibrated), calibrated)
+
+    def test_chunking_and_formats_agree(self) -> None:
+        rows = synthetic_rows(500)
+        fields = ["kind", "gpus", "power_w", *calibrate.NODE_COMPONENTS]
+        lines = [",".join(fields)]
+        for row in rows:
+            lines.append(",".join(repr(row[field]) if field in row else "" for field in fields).replace("'", ""))
+        csv_text = "\n".join(lines) + "\n"
+
+        _, whole = calibrate.calibrate(self.config, calibrate.iter_samples(io.StringIO(as_jsonl(rows)), "jsonl"))
+        with mock.patch.object(calibrate, "CHUNK_ROWS", 7):
+            _, chunked = calibrate.calibrate(self.config, calibrate.iter_samples(io.StringIO(csv_text), "csv"))
+        self.assertEqual(whole["rows"], chunked["rows"])
+        for key, value in whole["coefficients"].items():
+            self.assertAlmostEqual(value["after"], chunked["coefficients"][key]["after"], places=2, msg=key)
+
+    def test_stdlib_path(self) -> None:
+        # NumPy is optional: the stdlib reduction is what ships by default.
+        samples = calibrate.iter_samples(io.StringIO(as_jsonl(synthetic_rows(600))), "jsonl")
+        with mock.patch.object(calibrate, "np", None), mock.patch.object(calibrate, "CHUNK_ROWS", 64):
+            calibrated, summary = calibrate.calibrate(self.config, samples)
+        self.assertFalse(summary["numpy"])
+        for key, expected in TRUE_NODE.items():
+            self.assertAlmostEqual(calibrated["node"][key], expected, delta=5.0, msg=key)
+
+    @unittest.skipIf(calibrate.np is None, "NumPy is not installed")
+    def test_numpy_matches_stdlib(self) -> None:
+        text = as_jsonl(synthetic_rows(600))
+        with mock.patch.object(calibrate, "CHUNK_ROWS", 64):
+            _, vectorized = calibrate.calibrate(self.config, calibrate.iter_samples(io.StringIO(text), "jsonl"))
+            with mock.patch.object(calibrate, "np", None):
+                _, stdlib = calibrate.calibrate(self.config, calibrate.iter_samples(io.StringIO(text), "jsonl"))
+        self.assertTrue(vectorized["numpy"])
+        for key, value in stdlib["coefficients"].items():
+            self.assertAlmostEqual(value["after"], vectorized["coefficients"][key]["after"], places=2, msg=key)
+        self.assertAlmostEqual(stdlib["node_rmse_w"], vectorized["node_rmse_w"], places=2)
+
+    def test_unexplained_power_lands_in_other(self) -> None:
+        # Wall power only, fixed GPU count: the data cannot split components,
+        # so everything stays at the prior except the catch-all.
+        rows = [(n, {"power_w": 7000.0}) for n in range(1, 501)]
+        calibrated, _ = calibrate.calibrate(self.config, rows)
+        node = calibrated["node"]
+        explained = 8 * node["gpu_power_w"] + sum(node[key] for key in calibrate.NODE_COMPONENTS[1:])
+        self.assertAlmostEqual(explained, 7000.0, delta=5.0)
+        self.assertAlmostEqual(node["cpu_power_w"], 350.0, delta=1.0)
+        self.assertAlmostEqual(node["gpu_power_w"], 700.0, delta=1.0)
+        self.assertAlmostEqual(node["other_power_w"], 40.0 + 750.0, delta=15.0)
+        self.assertEqual(calibrated["fabric"], self.config["fabric"])
+
+    def test_clamps_to_schema_bounds(self) -> None:
+        rows = [(n, {"power_w": 10.0}) for n in range(1, 101)]
+        calibrated, summary = calibrate.calibrate(self.config, rows)
+        self.assertIn("node.other_power_w", summary["clamped"])
+        self.assertEqual(calibrated["node"]["other_power_w"], 0.0)
+        schema.validate_cluster_config(calibrated)
+
+    def test_rejects_bad_input(self) -> None:
+        with self.assertRaises(ValidationError):
+            calibrate.calibrate(self.config, [])
+        with self.assertRaises(ValidationError):
+            calibrate.calibrate(self.config, [(1, {"kind": "pdu", "power_w": 1})])
+        with self.assertRaises(ValidationError):
+            calibrate.calibrate(self.config, [(1, {"kind": "leaf"})])
+        with self.assertRaises(ValidationError):
+            calibrate.calibrate(self.config, [(1, {"power_w": "hot"})])
+        with self.assertRaises(ValidationError):
+            list(calibrate.iter_samples(io.StringIO("watts\n1\n"), "csv"))
+
+    def test_rejects_non_finite_fits(self) -> None:
+        rows = [(1, {"power_w": 7000.0})]
+        for weight in (float("inf"), float("nan"), 0.0):
+            with self.assertRaisesRegex(ValidationError, "prior-weight"):
+                calibrate.calibrate(self.config, rows, prior_weight=weight)
+        # Each reading is finite, but their sum overflows.
+        huge = [(n, {"kind": "optics", "power_w": 1e308}) for n in range(1, 4)]
+        with self.assertRaisesRegex(ValidationError, "fabric.optics_power_w_per_uplink"):
+            calibrate.calibrate(self.config, huge)
+
+    def test_cli_writes_valid_config(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            tmpdir = Path(tmp)
+            config = tmpdir / "config.json"
+            config.write_text(json.dumps(BASE_CONFIG), encoding="utf-8")
+            telemetry = tmpdir / "samples.jsonl"
+            telemetry.write_text(as_jsonl(synthetic_rows(200)), encoding="utf-8")
+            out = tmpdir / "calibrated.json"
+
+            with mock.patch("sys.stdout", new=io.StringIO()) as stdout:
+                code = cli.run(
+                    ["calibrate", "--config", str(config), "--telemetry", str(telemetry), "--out", str(out), "--json"]
+                )
+            self.assertEqual(code, 0)
+            summary = json.loads(stdout.getvalue())
+            self.assertEqual(summary["config"], str(out))
+            loaded = schema.load_cluster_config(out)
+            self.assertEqual(loaded["node"]["gpu_power_w"], summary["coefficients"]["node.gpu_power_w"]["after"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -77,6 +77,23 @@ class CliTests(unittest.TestCase):
             self.assertTrue((out / "cluster_report.json").exists())
             self.assertTrue((out / "build_summary.json").exists())
 
+    def test_solve_rejects_options_outside_their_mode(self) -> None:
+        config = str(ROOT / "tools" / "example_5mw_config.json")
+        for extra, message in (
+            (["--distributions", "d.json"], "--distributions requires --monte-carlo"),
+            (["--seed", "3"], "--seed requires --monte-carlo"),
+            (["--sensitivity", "--workers", "2"], "--workers requires --monte-carlo"),
+            (["--out", "caps.jsonl"], "--out requires --trace"),
+            (["--monte-carlo", "10", "--trace-format", "csv"], "--trace-format requires --trace"),
+        ):
+            result = self.run_cli(["solve", "--config", config, *extra])
+            self.assertEqual(result.returncode, 2, msg=extra)
+            self.assertIn(message, result.stderr)
+
+        result = self.run_cli(["solve", "--config", config])
+        self.assertEqual(result.returncode, 0, msg=result.stderr)
+        self.assertIn("it_cap_w", json.loads(result.stdout))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from mwpack import diff, package
+from mwpack.errors import ValidationError
+
+
+class DiffTests(unittest.TestCase):
+    def _trees(self, tmp: Path) -> tuple[Path, Path]:
+        a, b = tmp / "a", tmp / "b"
+        for root, line in ((a, "old"), (b, "new")):
+            root.mkdir()
+            (root / "memo.md").write_text(f"# Memo\n{line} line\n", encoding="utf-8")
+            (root / "cluster_report.json").write_text('{"nodes": 1}\n', encoding="utf-8")
+        (a / "gone.bin").write_bytes(b"\x00" * 10)
+        (b / "extra.bin").write_bytes(b"\x01" * 25)
+        return a, b
+
+    def test_archives_and_directories_agree(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            a, b = self._trees(Path(tmp))
+            zip_a, _ = package.create_bundle(a, source_date_epoch=1_700_000_000)
+            tar_b, _ = package.create_bundle(b, fmt="tar.gz", source_date_epoch=1_700_000_000)
+
+            from_archives = diff.diff_bundles(zip_a, tar_b)
+            from_dirs = diff.diff_bundles(a, b)
+            for result in (from_archives, from_dirs):
+                self.assertEqual(result["added"], [{"path": "extra.bin", "size": 25}])
+                self.assertEqual(result["removed"], [{"path": "gone.bin", "size": 10}])
+                self.assertEqual([entry["path"] for entry in result["changed"]], ["memo.md"])
+                self.assertEqual(result["unchanged"], 1)
+                self.assertEqual(result["size_delta"], 15)
+
+    def test_content_diff_for_text_members(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            a, b = self._trees(Path(tmp))
+            zip_a, _ = package.create_bundle(a)
+            zip_b, _ = package.create_bundle(b)
+            (changed,) = diff.diff_bundles(zip_a, zip_b, content=True)["changed"]
+            self.assertIn("-old line\n", changed["diff"])
+            self.assertIn("+new line\n", changed["diff"])
+            self.assertNotIn("diff", diff.diff_bundles(zip_a, zip_b)["changed"][0])
+
+    def test_directory_uses_hash_cache(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            a, _ = self._trees(Path(tmp))
+            for path in a.iterdir():
+                os.utime(path, ns=(1_600_000_000_000_000_000, 1_600_000_000_000_000_000))
+            package.create_bundle(a, incremental=True)
+            with mock.patch("mwpack.package.sha256_file", side_effect=AssertionError("re-hashed")):
+                manifest = package.directory_manifest(a)
+            self.assertEqual([entry["path"] for entry in manifest["files"]], ["cluster_report.json", "gone.bin", "memo.md"])
+
+    def test_rejects_unknown_inputs(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            other = Path(tmp) / "bundle.rar"
+            other.write_bytes(b"")
+            with self.assertRaises(ValidationError):
+                diff.diff_bundles(other, other)
+
+
+if __name__ == "__main__":
+    unittest.main()
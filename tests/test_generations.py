@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from mwpack import generations
+
+
+class GenerationTests(unittest.TestCase):
+    def _build(self, out_dir: Path, text: str) -> Path:
+        build_dir = generations.new_build_dir(out_dir)
+        (build_dir / "memo.md").write_text(text, encoding="utf-8")
+        return generations.publish(out_dir, build_dir)
+
+    def test_publish_flips_symlink_and_migrates_plain_dir(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            out_dir = Path(tmp) / "demo"
+            out_dir.mkdir()
+            (out_dir / "memo.md").write_text("legacy\n", encoding="utf-8")
+
+            first = self._build(out_dir, "one\n")
+            self.assertTrue(out_dir.is_symlink())
+            self.assertEqual(generations.current(out_dir), first.resolve())
+            self.assertEqual((out_dir / "memo.md").read_text(encoding="utf-8"), "one\n")
+            legacy, _ = generations.list_generations(out_dir)
+            self.assertEqual((legacy / "memo.md").read_text(encoding="utf-8"), "legacy\n")
+
+            second = self._build(out_dir, "two\n")
+            self.assertEqual((out_dir / "memo.md").read_text(encoding="utf-8"), "two\n")
+            self.assertEqual(generations.list_generations(out_dir)[-1], second)
+            self.assertFalse(os.path.isabs(os.readlink(out_dir)))
+
+    def test_collect_keeps_newest_and_live(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            out_dir = Path(tmp) / "demo"
+            built = [self._build(out_dir, f"{index}\n") for index in range(4)]
+            stale = generations.new_build_dir(out_dir)
+            os.utime(stale, (0, 0))
+
+            removed = generations.collect(out_dir, keep=2)
+            self.assertEqual(sorted(removed), sorted([*built[:2], stale]))
+            self.assertEqual(generations.list_generations(out_dir), built[2:])
+
+            # The live generation survives even when it is not among the newest.
+            (out_dir.parent / "flip").symlink_to(os.path.relpath(built[2], out_dir.parent))
+            os.replace(out_dir.parent / "flip", out_dir)
+            generations.collect(out_dir, keep=1)
+            self.assertEqual(generations.list_generations(out_dir), built[2:])
+
+    def test_collect_spares_generations_claimed_by_concurrent_builds(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            out_dir = Path(tmp) / "demo"
+            first = self._build(out_dir, "one\n")
+            live = self._build(out_dir, "two\n")
+            # Another build has claimed the next number but not linked it yet.
+            pending = generations._reserve(out_dir)
+
+            removed = generations.collect(out_dir, keep=1)
+            self.assertEqual(removed, [first])
+            self.assertEqual(generations.list_generations(out_dir), [live, pending])
+            self.assertEqual(generations.current(out_dir), live.resolve())
+
+    def test_background_collect(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            out_dir = Path(tmp) / "demo"
+            for index in range(3):
+                self._build(out_dir, f"{index}\n")
+            generations.collect_in_background(out_dir, keep=1).join()
+            self.assertEqual(len(generations.list_generations(out_dir)), 1)
+            self.assertEqual((out_dir / "memo.md").read_text(encoding="utf-8"), "2\n")
+
+
+if __name__ == "__main__":
+    unittest.main()
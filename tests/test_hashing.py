@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+import hashlib
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from mwpack import hashing
+
+
+class HashingTests(unittest.TestCase):
+    def test_all_strategies_agree(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "payload.bin"
+            data = bytes(range(256)) * 9000
+            path.write_bytes(data)
+            expected = hashlib.sha256(data).hexdigest()
+
+            self.assertEqual(hashing.sha256_file(path), expected)
+            # Each branch must produce the digest itself, not return None and
+            # fall through to the next strategy.
+            for name, patches in (
+                ("_sha256_mmap", {"MMAP_THRESHOLD": 1}),
+                ("_sha256_readinto", {"_file_digest": None}),
+            ):
+                returned: list[str | None] = []
+                strategy = getattr(hashing, name)
+
+                def spy(handle, strategy=strategy, returned=returned):
+                    returned.append(strategy(handle))
+                    return returned[-1]
+
+                with mock.patch.multiple(hashing, **patches, **{name: spy}):
+                    self.assertEqual(hashing.sha256_file(path), expected)
+                self.assertEqual(returned, [expected], msg=name)
+
+    def test_empty_file(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "empty.bin"
+            path.write_bytes(b"")
+            with mock.patch.object(hashing, "MMAP_THRESHOLD", 0):
+                self.assertEqual(hashing.sha256_file(path), hashlib.sha256(b"").hexdigest())
+
+
+if __name__ == "__main__":
+    unittest.main()
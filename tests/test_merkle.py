@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import json
+import tempfile
+import unittest
+import zipfile
+from pathlib import Path
+
+from mwpack import merkle, package
+from mwpack.errors import ValidationError
+from mwpack.hashing import sha256_file
+
+
+class MerkleTests(unittest.TestCase):
+    def _write_tree(self, root: Path) -> None:
+        (root / "memo.md").write_text("memo\n", encoding="utf-8")
+        (root / "assets" / "img").mkdir(parents=True)
+        (root / "assets" / "img" / "a.bin").write_bytes(b"a" * 5000)
+        (root / "assets" / "b.txt").write_text("b\n", encoding="utf-8")
+
+    def test_v2_manifest_in_bundle(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            self._write_tree(root)
+
+            bundle, manifest = package.create_bundle(root, source_date_epoch=1_700_000_000, manifest_version=2)
+            with zipfile.ZipFile(bundle, "r") as zf:
+                stored = json.loads(zf.read("MANIFEST.json").decode("utf-8"))
+            self.assertEqual(stored, manifest)
+            self.assertEqual(stored["version"], 2)
+            self.assertEqual(set(stored["directories"]), {"", "assets", "assets/img"})
+            lookup = {entry["path"]: entry for entry in stored["files"]}
+            self.assertEqual(lookup["memo.md"]["sha256"], sha256_file(root / "memo.md"))
+            merkle.verify_manifest(stored)
+
+    def test_partial_verification(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            self._write_tree(root)
+            records = [merkle.file_record(rel, path, chunk_size=1024) for rel, path, _ in package._sorted_payload_files(root)]
+            manifest = merkle.build_manifest(records, chunk_size=1024)
+
+            (root / "assets" / "b.txt").write_text("changed\n", encoding="utf-8")
+            self.assertEqual(merkle.verify_files(manifest, root, ["memo.md"]), [])
+            self.assertEqual(merkle.verify_files(manifest, root), ["assets/b.txt"])
+            self.assertTrue(merkle.verify_chunk(manifest, "assets/img/a.bin", 4, b"a" * 904))
+            self.assertFalse(merkle.verify_chunk(manifest, "assets/img/a.bin", 4, b"b" * 904))
+
+            tampered = json.loads(json.dumps(manifest))
+            tampered["files"][0]["merkle_root"] = "0" * 64
+            with self.assertRaises(ValidationError):
+                merkle.verify_manifest(tampered)
+
+    def test_changed_paths_prunes_unchanged_subtrees(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            self._write_tree(root)
+            _, before = package.create_bundle(root, manifest_version=2)
+            (root / "assets" / "img" / "a.bin").write_bytes(b"z" * 5000)
+            (root / "new.txt").write_text("new\n", encoding="utf-8")
+            _, after = package.create_bundle(root, manifest_version=2)
+
+            self.assertNotEqual(before["directories"]["assets"], after["directories"]["assets"])
+            self.assertEqual(merkle.changed_paths(before, after), ["assets/img/a.bin", "new.txt"])
+            self.assertEqual(merkle.changed_paths(after, after), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
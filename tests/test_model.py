@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import copy
+import itertools
 import unittest
 
 from mwpack import model, schema
@@ -74,6 +75,201 @@ class ModelTests(unittest.TestCase):
         r2 = model.solve_max_nodes(self.config)
         self.assertEqual(r1["oversubscription_ratio"], r2["oversubscription_ratio"])
 
+    def test_max_nodes_batch_matches_solver(self) -> None:
+        fabric = self.config["fabric"]
+        for cap in (500.0, 63_000.0, 2_000_000.0, 5_000_000.0, 37_777_000.0):
+            config = copy.deepcopy(self.config)
+            config["it_cap_w"] = cap
+            sample = (
+                model.compute_node_power_w(config),
+                fabric["leaf"]["power_w"],
+                fabric["spine"]["power_w"],
+                fabric["optics_power_w_per_uplink"],
+            )
+            self.assertEqual(model.max_nodes_batch(config, [sample]), [model.solve_max_nodes(config)["nodes"]])
+
+    def _mixed(self, cap: float, node_types: list[dict]) -> dict:
+        payload = {"it_cap_w": cap, "nodes": node_types, "fabric": copy.deepcopy(BASE_CONFIG["fabric"])}
+        return schema.validate_cluster_config(payload)
+
+    def test_mixed_single_type_matches_homogeneous(self) -> None:
+        for cap in (500.0, 100_000.0, 5_000_000.0, 37_777_000.0):
+            homogeneous = copy.deepcopy(self.config)
+            homogeneous["it_cap_w"] = cap
+            expected = model.solve_max_nodes(homogeneous)
+            report = model.solve_mixed(self._mixed(cap, [{"name": "a", **BASE_CONFIG["node"]}]))
+            self.assertEqual(report["nodes"], expected["nodes"])
+            self.assertEqual(report["p_total_w"], expected["p_total_w"])
+            self.assertTrue(report["optimal"])
+
+    def test_mixed_matches_brute_force(self) -> None:
+        node_types = [
+            {"name": "big", **BASE_CONFIG["node"], "max_count": 12},
+            {**BASE_CONFIG["node"], "name": "small", "gpu_count": 2, "gpu_power_w": 500, "weight": 1.7, "max_count": 20},
+            {**BASE_CONFIG["node"], "name": "lean", "gpu_count": 4, "gpu_power_w": 300, "weight": 0.5, "max_count": 15},
+        ]
+        config = self._mixed(60_000.0, node_types)
+        report = model.solve_mixed(config)
+
+        best = 0.0
+        for counts in itertools.product(*(range(sku["max_count"] + 1) for sku in config["nodes"])):
+            trial = model.evaluate_mixed_cluster(config, list(counts))
+            if trial["p_total_w"] <= config["it_cap_w"]:
+                worth = sum(c * sku["gpu_count"] * sku["weight"] for c, sku in zip(counts, config["nodes"]))
+                best = max(best, worth)
+        self.assertAlmostEqual(report["objective_value"], best)
+        self.assertLessEqual(report["p_total_w"], config["it_cap_w"])
+        self.assertEqual(sum(t["nodes"] for t in report["node_types"]), report["nodes"])
+
+    def test_mixed_config_validation(self) -> None:
+        sku = {"name": "a", **BASE_CONFIG["node"]}
+        with self.assertRaises(ValidationError):
+            self._mixed(1_000.0, [sku, dict(sku)])
+        both = {"it_cap_w": 1_000, "node": BASE_CONFIG["node"], "nodes": [sku], "fabric": BASE_CONFIG["fabric"]}
+        with self.assertRaises(ValidationError):
+            schema.validate_cluster_config(both)
+
+    def _constrained(self, cap: float, constraints: dict) -> dict:
+        payload = copy.deepcopy(BASE_CONFIG)
+        payload["it_cap_w"] = cap
+        payload["fabric"]["leaf"]["uplink_ports"] = 16
+        payload["constraints"] = constraints
+        return schema.validate_cluster_config(payload)
+
+    def _brute_force_nodes(self, config: dict) -> int:
+        constraints = config["constraints"]
+        best = 0
+        for nodes in range(int(config["it_cap_w"] // model.compute_node_power_w(config)) + 1):
+            trial = model.evaluate_cluster(config, nodes)
+            if (
+                trial["p_total_w"] <= config["it_cap_w"]
+                and trial["leaves"] <= constraints.get("max_leaves", trial["leaves"])
+                and trial["spines"] <= constraints.get("max_spines", trial["spines"])
+                and trial["uplinks_total"] <= constraints.get("max_optics", trial["uplinks_total"])
+                and trial["oversubscription_ratio"] <= constraints.get("max_oversubscription", float("inf"))
+            ):
+                best = nodes
+        return best
+
+    def test_constraints_match_brute_force(self) -> None:
+        cases = [
+            ({}, "it_cap_w"),
+            ({"max_leaves": 3}, "max_leaves"),
+            ({"max_spines": 1}, "max_spines"),
+            ({"max_optics": 40}, "max_optics"),
+            ({"max_oversubscription": 1.75}, "max_oversubscription"),
+            ({"max_oversubscription": 1.75, "max_leaves": 2}, "max_oversubscription"),
+        ]
+        for constraints, binding in cases:
+            with self.subTest(constraints=constraints):
+                config = self._constrained(1_000_000.0, constraints)
+                report = model.solve_max_nodes(config)
+                self.assertEqual(report["nodes"], self._brute_force_nodes(config))
+                self.assertEqual(report["binding_constraint"], binding)
+                fabric = config["fabric"]
+                sample = (
+                    model.compute_node_power_w(config),
+                    fabric["leaf"]["power_w"],
+                    fabric["spine"]["power_w"],
+                    fabric["optics_power_w_per_uplink"],
+                )
+                self.assertEqual(model.max_nodes_batch(config, [sample]), [report["nodes"]])
+                self.assertEqual(next(model.max_nodes_trace(config, [1_000_000.0]))[0], report["nodes"])
+
+    def test_mixed_respects_constraints(self) -> None:
+        node_types = [
+            {"name": "big", **BASE_CONFIG["node"], "max_count": 40},
+            {**BASE_CONFIG["node"], "name": "small", "gpu_count": 2, "gpu_power_w": 500, "weight": 1.7, "max_count": 40},
+        ]
+        payload = {
+            "it_cap_w": 200_000.0,
+            "nodes": node_types,
+            "fabric": copy.deepcopy(BASE_CONFIG["fabric"]),
+            "constraints": {"max_oversubscription": 0.9, "max_leaves": 2},
+        }
+        payload["fabric"]["leaf"]["host_ports"] = 16
+        payload["fabric"]["leaf"]["uplink_ports"] = 16
+        config = schema.validate_cluster_config(payload)
+        report = model.solve_mixed(config)
+
+        best = 0.0
+        for counts in itertools.product(*(range(sku["max_count"] + 1) for sku in config["nodes"])):
+            trial = model.evaluate_mixed_cluster(config, list(counts))
+            if (
+                trial["p_total_w"] <= config["it_cap_w"]
+                and trial["leaves"] <= 2
+                and trial["oversubscription_ratio"] <= 0.9
+            ):
+                worth = sum(c * sku["gpu_count"] * sku["weight"] for c, sku in zip(counts, config["nodes"]))
+                best = max(best, worth)
+        self.assertAlmostEqual(report["objective_value"], best)
+        self.assertLessEqual(report["oversubscription_ratio"], 0.9)
+        self.assertEqual(report["inputs"]["constraints"], config["constraints"])
+
+    def test_constraint_validation(self) -> None:
+        for constraints in ({"max_spine": 1}, {"max_leaves": -1}, {"max_oversubscription": 0}, []):
+            payload = copy.deepcopy(BASE_CONFIG)
+            payload["constraints"] = constraints
+            with self.assertRaises(ValidationError):
+                schema.validate_cluster_config(payload)
+
+    def test_rack_packing(self) -> None:
+        payload = copy.deepcopy(BASE_CONFIG)
+        payload["rack"] = {"power_cap_w": 130_000, "slots": 24, "leaves_per_rack": 2}
+        config = schema.validate_cluster_config(payload)
+        report = model.solve_cluster(config)
+        racks = report["racks"]
+        layout = racks["layout"]
+
+        self.assertEqual(sum(entry["nodes"] for entry in layout), report["nodes"])
+        self.assertEqual(sum(entry["leaves"] for entry in layout), report["leaves"])
+        self.assertEqual(sum(entry["spines"] for entry in layout), report["spines"])
+        self.assertAlmostEqual(sum(entry["p_w"] for entry in layout), report["p_total_w"])
+        for entry in layout:
+            self.assertLessEqual(entry["p_w"], 130_000)
+            self.assertLessEqual(entry["nodes"], 24)
+            self.assertLessEqual(entry["leaves"], 2)
+            self.assertAlmostEqual(entry["stranded_w"], 130_000 - entry["p_w"])
+        # 20 nodes plus a leaf and its optics fill a 130 kW rack.
+        self.assertEqual((layout[0]["nodes"], layout[0]["leaves"], layout[0]["stranded_w"]), (20, 1, 4294.0))
+        self.assertGreaterEqual(racks["racks"], racks["racks_lower_bound"])
+        self.assertEqual(racks["spine_racks"], 1)
+
+    def test_rack_too_small_for_node(self) -> None:
+        payload = copy.deepcopy(BASE_CONFIG)
+        payload["rack"] = {"power_cap_w": 5_000, "slots": 4}
+        with self.assertRaises(ValidationError):
+            model.solve_cluster(schema.validate_cluster_config(payload))
+
+    def test_sensitivity_matches_resolves(self) -> None:
+        result = model.sensitivity(self.config)
+        nodes = result["nodes"]
+        self.assertEqual(nodes, model.solve_max_nodes(self.config)["nodes"])
+        self.assertAlmostEqual(result["stranded_w"], self.config["it_cap_w"] - result["p_total_w"])
+
+        for key in ("node.gpu_power_w", "node.cpu_power_w", "fabric.optics_power_w_per_uplink"):
+            section, *path = key.split(".")
+            reduction = result["components"][key]["reduction_w_for_next_node"]
+            value = result["components"][key]["value"]
+            for delta, expected in ((reduction + 1e-6, nodes + 1), (reduction * 0.99, nodes)):
+                config = copy.deepcopy(self.config)
+                target = config[section]
+                for part in path[:-1]:
+                    target = target[part]
+                target[path[-1]] = value - delta
+                self.assertEqual(model.solve_max_nodes(config)["nodes"], expected, key)
+
+        for name, field in (("next_leaf", "leaves"), ("next_spine", "spines")):
+            step = result["breakpoints"][name]["nodes"]
+            current = model.evaluate_cluster(self.config, nodes)[field]
+            self.assertEqual(model.evaluate_cluster(self.config, nodes + step - 1)[field], current)
+            self.assertEqual(model.evaluate_cluster(self.config, nodes + step)[field], current + 1)
+        self.assertGreater(result["breakpoints"]["next_spine"]["nodes"], result["breakpoints"]["next_leaf"]["nodes"])
+
+    def test_sensitivity_rejects_mixed(self) -> None:
+        with self.assertRaises(ValidationError):
+            model.sensitivity(self._mixed(100_000.0, [{"name": "a", **BASE_CONFIG["node"]}]))
+
 
 if __name__ == "__main__":
     unittest.main()
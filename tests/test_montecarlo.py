@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import copy
+import unittest
+from unittest import mock
+
+from mwpack import model, montecarlo, schema
+from mwpack.errors import ValidationError
+from tests.test_model import BASE_CONFIG
+
+
+class MonteCarloTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.config = schema.validate_cluster_config(copy.deepcopy(BASE_CONFIG))
+
+    def test_deterministic_across_worker_counts(self) -> None:
+        distributions = montecarlo.validate_distributions(
+            {
+                "node.gpu_power_w": {"dist": "normal", "stddev": 40},
+                "fabric.leaf.power_w": {"dist": "uniform", "low": 400, "high": 520},
+            },
+            self.config,
+        )
+        with mock.patch.object(montecarlo, "CHUNK_SIZE", 1000):
+            serial = montecarlo.run(self.config, distributions, samples=3000, seed=7, workers=1)
+            parallel = montecarlo.run(self.config, distributions, samples=3000, seed=7, workers=2)
+        serial.pop("workers")
+        parallel.pop("workers")
+        self.assertEqual(serial, parallel)
+        nodes = serial["nodes"]
+        self.assertLessEqual(nodes["min"], nodes["p05"])
+        self.assertLessEqual(nodes["p05"], nodes["p50"])
+        self.assertLessEqual(nodes["p50"], nodes["p95"])
+        self.assertLessEqual(nodes["p95"], nodes["max"])
+
+    def test_zero_variance_matches_point_solve(self) -> None:
+        distributions = montecarlo.validate_distributions(
+            {"node.cpu_power_w": {"dist": "normal", "stddev": 0}},
+            self.config,
+        )
+        result = montecarlo.run(self.config, distributions, samples=50, workers=1)
+        expected = model.solve_max_nodes(self.config)["nodes"]
+        self.assertEqual(result["nodes"]["min"], expected)
+        self.assertEqual(result["nodes"]["max"], expected)
+        self.assertEqual(result["p_exceed_it_cap"], 0.0)
+
+    def test_rejects_unknown_keys(self) -> None:
+        with self.assertRaises(ValidationError):
+            montecarlo.validate_distributions({"node.gpu_count": {"dist": "normal", "stddev": 1}}, self.config)
+
+
+if __name__ == "__main__":
+    unittest.main()
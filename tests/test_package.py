@@ -1,13 +1,16 @@
 from __future__ import annotations
 
 import json
+import os
 import tarfile
 import tempfile
 import unittest
 import zipfile
 from pathlib import Path
+from unittest import mock
 
-from mwpack import package
+from mwpack import package, pipeline
+from mwpack.errors import ValidationError
 from mwpack.hashing import sha256_file
 
 
@@ -53,6 +56,117 @@ class PackageTests(unittest.TestCase):
             with tarfile.open(bundle, "r:gz") as tf:
                 self.assertEqual(tf.getnames(), ["cluster_report.json", "memo.md", "MANIFEST.json"])
 
+    def test_incremental_zip_matches_clean_build(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            (root / "memo.md").write_text("memo\n", encoding="utf-8")
+            (root / "cluster_report.json").write_text('{"nodes":1}\n', encoding="utf-8")
+            (root / "assets").mkdir()
+            for idx in range(5):
+                (root / "assets" / f"f{idx}.bin").write_bytes(bytes([idx]) * 4096)
+            past = 1_600_000_000
+            for path in root.rglob("*"):
+                os.utime(path, (past, past))
+
+            package.create_bundle(root, source_date_epoch=1_700_000_000, incremental=True)
+            self.assertTrue((root / package.HASH_CACHE_NAME).exists())
+
+            (root / "memo.md").write_text("memo v2\n", encoding="utf-8")
+            with mock.patch.object(package, "_copy_zip_member", wraps=package._copy_zip_member) as copied:
+                bundle, _ = package.create_bundle(root, source_date_epoch=1_700_000_000, incremental=True)
+            self.assertEqual(copied.call_count, 6)
+            incremental = bundle.read_bytes()
+
+            clean, _ = package.create_bundle(root, source_date_epoch=1_700_000_000)
+            self.assertEqual(incremental, clean.read_bytes())
+            with zipfile.ZipFile(clean, "r") as zf:
+                self.assertNotIn(package.HASH_CACHE_NAME, zf.namelist())
+                self.assertEqual(zf.read("memo.md"), b"memo v2\n")
+
+    def test_incremental_reuses_cached_hashes(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            (root / "memo.md").write_text("memo\n", encoding="utf-8")
+            (root / "notes.md").write_text("notes\n", encoding="utf-8")
+            for path in root.iterdir():
+                os.utime(path, (1_600_000_000, 1_600_000_000))
+            package.create_bundle(root, incremental=True)
+
+            (root / "notes.md").write_text("notes v2\n", encoding="utf-8")
+            with mock.patch.object(pipeline, "_read_file", wraps=pipeline._read_file) as read:
+                _, manifest = package.create_bundle(root, incremental=True)
+            # Only the edited file is opened; the cached one is never read.
+            self.assertEqual([call.args[0] for call in read.call_args_list], ["notes.md"])
+            self.assertEqual(
+                {entry["path"]: entry["sha256"] for entry in manifest["files"]},
+                {"memo.md": sha256_file(root / "memo.md"), "notes.md": sha256_file(root / "notes.md")},
+            )
+
+    def test_hash_cache_tolerates_bad_entries_and_keeps_filtered_files(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            (root / "memo.md").write_text("memo\n", encoding="utf-8")
+            (root / "data.json").write_text("{}\n", encoding="utf-8")
+            (root / "gone.md").write_text("gone\n", encoding="utf-8")
+            cache_path = root / package.HASH_CACHE_NAME
+            for payload in (
+                {"version": 1, "files": {"memo.md": {"sig": 1}}},
+                {"version": 1, "written_ns": "soon", "files": {}},
+                {"version": 1, "written_ns": 0, "files": {"memo.md": {"signature": [1, 2, 3], "records": {"1": 5}}}},
+            ):
+                cache_path.write_text(json.dumps(payload), encoding="utf-8")
+                self.assertEqual(len(package.directory_manifest(root)["files"]), 3)
+                package.create_bundle(root, incremental=True)
+
+            # A filtered run keeps the other files' hashes; deleted files go.
+            (root / "gone.md").unlink()
+            package.create_bundle(root, incremental=True, include=["*.md"])
+            stored = json.loads(cache_path.read_text(encoding="utf-8"))["files"]
+            self.assertEqual(sorted(stored), ["data.json", "memo.md"])
+
+    def test_payload_filters_and_ignore_file(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            (root / "memo.md").write_text("memo\n", encoding="utf-8")
+            (root / "notes.tmp").write_text("x\n", encoding="utf-8")
+            (root / "build" / "cache").mkdir(parents=True)
+            (root / "build" / "cache" / "a.json").write_text("{}\n", encoding="utf-8")
+            (root / "data").mkdir()
+            (root / "data" / "a.json").write_text("{}\n", encoding="utf-8")
+            (root / "data" / "b.csv").write_text("b\n", encoding="utf-8")
+            (root / package.IGNORE_FILE_NAME).write_text("# scratch\n*.tmp\nbuild/\n", encoding="utf-8")
+
+            files = package._sorted_payload_files(root)
+            self.assertEqual(
+                [rel for rel, _, _ in files],
+                [".mwpackignore", "data/a.json", "data/b.csv", "memo.md"],
+            )
+            self.assertEqual(files[1][2].st_size, 3)
+
+            filtered = package._sorted_payload_files(root, include=["*.json", "*.md"], exclude=["data/b.csv"])
+            self.assertEqual([rel for rel, _, _ in filtered], ["data/a.json", "memo.md"])
+
+    def test_symlink_policies(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp) / "pkg"
+            (root / "sub").mkdir(parents=True)
+            (root / "sub" / "f.txt").write_text("f\n", encoding="utf-8")
+            try:
+                (root / "link.txt").symlink_to(root / "sub" / "f.txt")
+                (root / "linkdir").symlink_to(root / "sub", target_is_directory=True)
+                (root / "sub" / "loop").symlink_to(root, target_is_directory=True)
+            except OSError:
+                self.skipTest("symlinks unavailable")
+
+            def names(policy: str) -> list[str]:
+                return [rel for rel, _, _ in package._sorted_payload_files(root, symlinks=policy)]
+
+            self.assertEqual(names("files"), ["link.txt", "sub/f.txt"])
+            self.assertEqual(names("skip"), ["sub/f.txt"])
+            self.assertEqual(names("all"), ["link.txt", "linkdir/f.txt", "sub/f.txt"])
+            with self.assertRaises(ValidationError):
+                names("error")
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import io
+import json
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from mwpack import cli, pinning
+from mwpack.errors import ValidationError
+
+SHA = "de0fac2e4500dabe0009e67214ff5f5447ce83dd"
+
+WORKFLOW = f"""\
+jobs:
+  test:
+    steps:
+      - uses: actions/checkout@{SHA} # v6
+      - name: Setup
+        uses: "actions/setup-python@v5"
+      - uses: ./.github/actions/local
+      - uses: docker://alpine:3
+      - uses: someone/no-ref
+"""
+
+COMPOSITE = f"""\
+runs:
+  using: composite
+  steps:
+    - uses: actions/cache@{SHA}
+    - uses: actions/upload-artifact@main
+"""
+
+
+def make_repo(root: Path, *, pinned: bool = False) -> Path:
+    (root / ".github" / "workflows").mkdir(parents=True)
+    (root / ".github" / "actions" / "local").mkdir(parents=True)
+    workflow = f"jobs:\n  a:\n    steps:\n      - uses: actions/checkout@{SHA}\n" if pinned else WORKFLOW
+    (root / ".github" / "workflows" / "ci.yaml").write_text(workflow, encoding="utf-8")
+    (root / ".github" / "workflows" / "notes.txt").write_text("uses: x/y@v1\n", encoding="utf-8")
+    (root / ".github" / "actions" / "local" / "action.yml").write_text(
+        COMPOSITE if not pinned else "runs:\n  using: composite\n", encoding="utf-8"
+    )
+    # Vendored trees are not the repository's own actions.
+    (root / "node_modules" / "dep").mkdir(parents=True)
+    (root / "node_modules" / "dep" / "action.yml").write_text("- uses: a/b@v1\n", encoding="utf-8")
+    return root
+
+
+class PinningTests(unittest.TestCase):
+    def test_scan_text_reasons(self) -> None:
+        findings = pinning.scan_text(WORKFLOW)
+        self.assertEqual(
+            [(f["line"], f["uses"], f["reason"]) for f in findings],
+            [(6, "actions/setup-python@v5", "not_sha"), (9, "someone/no-ref", "missing_ref")],
+        )
+
+    def test_scans_workflows_and_composite_actions(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            repo = make_repo(Path(tmp) / "repo")
+            result = pinning.scan_repos([repo], workers=1)
+            self.assertFalse(result["ok"])
+            report = result["repos"][0]
+            self.assertEqual(
+                [entry["path"] for entry in report["files"]],
+                [".github/actions/local/action.yml", ".github/workflows/ci.yaml"],
+            )
+            self.assertEqual(
+                sorted((f["file"], f["line"]) for f in report["findings"]),
+                [
+                    (".github/actions/local/action.yml", 5),
+                    (".github/workflows/ci.yaml", 6),
+                    (".github/workflows/ci.yaml", 9),
+                ],
+            )
+
+    def test_cache_and_process_pool(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            tmpdir = Path(tmp)
+            repos = [make_repo(tmpdir / "a"), make_repo(tmpdir / "b"), make_repo(tmpdir / "c", pinned=True)]
+            cache = tmpdir / "cache" / "pins.json"
+
+            first = pinning.scan_repos(repos, workers=2, cache_path=cache)
+            with mock.patch.object(pinning, "scan_text", side_effect=AssertionError("re-parsed")):
+                second = pinning.scan_repos(repos, workers=1, cache_path=cache)
+            self.assertEqual(second["cached"], second["files"])
+            for report in (*first["repos"], *second["repos"]):
+                report.pop("cached")
+            self.assertEqual(first["repos"], second["repos"])
+            self.assertEqual(second["repos"][2]["findings"], [])
+
+            # An edited file is re-parsed; a partial run keeps the other
+            # mirrors' results, and only long-unseen entries are pruned.
+            before = json.loads(cache.read_text(encoding="utf-8"))["results"]
+            (repos[2] / ".github" / "workflows" / "ci.yaml").write_text(WORKFLOW + "# edited\n", encoding="utf-8")
+            third = pinning.scan_repos([repos[2]], workers=1, cache_path=cache)
+            self.assertEqual(third["cached"], 1)
+            self.assertEqual(len(third["repos"][0]["findings"]), 2)
+            stored = json.loads(cache.read_text(encoding="utf-8"))["results"]
+            edited = {entry["sha256"] for entry in third["repos"][0]["files"]}
+            self.assertEqual(set(stored), set(before) | edited)
+
+            with mock.patch.object(pinning.time, "time", return_value=time.time() + pinning.CACHE_MAX_AGE_SECONDS + 60):
+                pinning.scan_repos([repos[2]], workers=1, cache_path=cache)
+            stored = json.loads(cache.read_text(encoding="utf-8"))["results"]
+            self.assertEqual(set(stored), edited)
+
+    def test_unreadable_file_fails_only_its_repo(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            tmpdir = Path(tmp)
+            broken = make_repo(tmpdir / "broken", pinned=True)
+            (broken / "act").mkdir()
+            (broken / "act" / "action.yml").symlink_to(tmpdir / "nonexistent")
+            healthy = make_repo(tmpdir / "healthy")
+            cache = tmpdir / "pins.json"
+
+            result = pinning.scan_repos([broken, healthy], workers=2, cache_path=cache)
+            self.assertFalse(result["ok"])
+            self.assertEqual(result["errors"], 1)
+            first, second = result["repos"]
+            self.assertEqual([error["file"] for error in first["errors"]], ["act/action.yml"])
+            self.assertEqual(first["findings"], [])
+            self.assertEqual(second["errors"], [])
+            self.assertEqual(len(second["findings"]), 3)
+            stored = json.loads(cache.read_text(encoding="utf-8"))["results"]
+            self.assertTrue({entry["sha256"] for entry in second["files"]} <= set(stored))
+
+            with mock.patch("sys.stdout", new=io.StringIO()) as stdout:
+                self.assertEqual(cli.run(["check-pins", str(broken)]), 2)
+            self.assertIn("act/action.yml: unreadable", stdout.getvalue())
+
+    def test_cli_json_and_exit_code(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            bad = make_repo(Path(tmp) / "bad")
+            good = make_repo(Path(tmp) / "good", pinned=True)
+            with mock.patch("sys.stdout", new=io.StringIO()) as stdout:
+                self.assertEqual(cli.run(["check-pins", str(good), "--json"]), 0)
+            self.assertTrue(json.loads(stdout.getvalue())["ok"])
+            with mock.patch("sys.stdout", new=io.StringIO()) as stdout:
+                self.assertEqual(cli.run(["check-pins", str(good), str(bad), "--workers", "2"]), 2)
+            self.assertIn("not pinned to full SHA: actions/setup-python@v5", stdout.getvalue())
+            with self.assertRaises(ValidationError):
+                pinning.scan_repos([Path(tmp) / "missing"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import hashlib
+import tempfile
+import unittest
+from pathlib import Path
+from typing import Any
+from unittest import mock
+
+from mwpack import merkle, package, pipeline
+from mwpack.errors import ValidationError
+
+
+class PipelineTests(unittest.TestCase):
+    def test_streams_in_order_with_records(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            # Larger than QUEUE_CHUNKS * CHUNK_SIZE, so the reader blocks on the writer.
+            big = bytes(range(256)) * (4096 * (pipeline.QUEUE_CHUNKS + 2) + 3)
+            (root / "big.bin").write_bytes(big)
+            (root / "empty.txt").write_bytes(b"")
+            for index in range(20):
+                (root / f"f{index:02d}.txt").write_text(f"{index}\n" * index, encoding="utf-8")
+            jobs = [(path.name, path, path.stat().st_size) for path in sorted(root.iterdir())]
+
+            seen = []
+            for stream in pipeline.stream_files(jobs, manifest_version=2, workers=3):
+                data = b"".join(stream)
+                record = stream.record()
+                seen.append(stream.rel)
+                self.assertEqual(record["sha256"], hashlib.sha256(data).hexdigest())
+                self.assertEqual(record, merkle.file_record(stream.rel, root / stream.rel))
+            self.assertEqual(seen, [rel for rel, _, _ in jobs])
+
+    def test_reader_errors_reach_the_writer(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            missing = Path(tmp) / "missing.bin"
+            streams = pipeline.stream_files([("missing.bin", missing, 0)], manifest_version=1, workers=2)
+            with self.assertRaises(FileNotFoundError):
+                for stream in streams:
+                    stream.read()
+
+    def test_file_changed_after_scan_is_rejected(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            memo = root / "memo.md"
+            scan = package._sorted_payload_files
+
+            def scan_then_edit(content: bytes) -> Any:
+                def wrapped(*args: Any, **kwargs: Any) -> Any:
+                    files = scan(*args, **kwargs)
+                    memo.write_bytes(content)
+                    return files
+
+                return wrapped
+
+            for fmt in ("zip", "tar.gz"):
+                for content in (b"short\n" + b"grown after the scan\n", b"s\n"):
+                    memo.write_bytes(b"short\n")
+                    with mock.patch.object(package, "_sorted_payload_files", scan_then_edit(content)):
+                        with self.assertRaisesRegex(ValidationError, "file changed while packaging: memo.md"):
+                            package.create_bundle(root, fmt=fmt, workers=2)
+
+    def test_bundles_do_not_depend_on_workers(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            (root / "memo.md").write_text("memo\n", encoding="utf-8")
+            (root / "data").mkdir()
+            (root / "data" / "big.bin").write_bytes(b"\x07" * (3 * pipeline.CHUNK_SIZE + 11))
+            for fmt in ("zip", "tar.gz"):
+                digests = set()
+                for workers in (1, 4):
+                    bundle, _ = package.create_bundle(
+                        root, fmt=fmt, source_date_epoch=1_700_000_000, manifest_version=2, workers=workers
+                    )
+                    digests.add(package.checksum_for_bundle(bundle))
+                    bundle.unlink()
+                self.assertEqual(len(digests), 1, fmt)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import copy
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from mwpack import build, package, reproduce
+from tests.test_model import BASE_CONFIG
+
+ROOT = Path(__file__).resolve().parents[1]
+MEMO = ROOT / "docs" / "memo_template.md"
+EPOCH = 1_700_000_000
+
+
+def make_artifact(tmpdir: Path, name: str, config: dict | None, *, fmt: str = "zip", version: int = 1) -> Path:
+    config_path = None
+    if config is not None:
+        config_path = tmpdir / f"{name}.json"
+        config_path.write_text(json.dumps(config), encoding="utf-8")
+    out_dir, _ = build.build_artifacts(
+        MEMO,
+        config_path,
+        out=tmpdir / name,
+        name=name,
+        source_date_epoch=EPOCH,
+        cache={},
+        background_gc=False,
+    )
+    package.create_bundle(out_dir, fmt=fmt, source_date_epoch=EPOCH, manifest_version=version)
+    return out_dir
+
+
+class ReproduceTests(unittest.TestCase):
+    def test_reproduces_builds_in_a_pool(self) -> None:
+        mixed = json.loads((ROOT / "tools" / "example_mixed_config.json").read_text(encoding="utf-8"))
+        mixed["objective"] = "nodes"
+        with tempfile.TemporaryDirectory() as tmp:
+            tmpdir = Path(tmp)
+            dirs = [
+                make_artifact(tmpdir, "single", copy.deepcopy(BASE_CONFIG)),
+                make_artifact(tmpdir, "mixed", mixed, fmt="tar.gz", version=2),
+                make_artifact(tmpdir, "empty", None),
+            ]
+            result = reproduce.reproduce(dirs, workers=2)
+            self.assertTrue(result["ok"], result)
+            self.assertEqual([artifact["dir"] for artifact in result["artifacts"]], [str(d) for d in dirs])
+            self.assertIn("bundle.tar.gz", result["artifacts"][1]["checks"])
+            self.assertTrue(all(check["ok"] for check in result["artifacts"][0]["checks"].values()))
+
+    def test_reports_first_divergent_member(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            tmpdir = Path(tmp)
+            edited = make_artifact(tmpdir, "edited", copy.deepcopy(BASE_CONFIG))
+            with (edited / "memo.md").open("a", encoding="utf-8") as handle:
+                handle.write("late edit\n")
+
+            # Same payload, different archive timestamps.
+            restamped = make_artifact(tmpdir, "restamped", copy.deepcopy(BASE_CONFIG))
+            package.create_bundle(restamped, fmt="zip", source_date_epoch=EPOCH + 86_400)
+
+            corrupted = make_artifact(tmpdir, "corrupted", copy.deepcopy(BASE_CONFIG))
+            (corrupted / "cluster_report.json").write_text("[]\n", encoding="utf-8")
+            unsized = make_artifact(tmpdir, "unsized", copy.deepcopy(BASE_CONFIG))
+            (unsized / "cluster_report.json").write_text('{"inputs": {}}\n', encoding="utf-8")
+
+            dirs = [edited, restamped, tmpdir / "missing", corrupted, unsized]
+            result = reproduce.reproduce(dirs, workers=2)
+            self.assertFalse(result["ok"])
+            first, second, third, fourth, fifth = result["artifacts"]
+            self.assertEqual(first["first_divergence"], "memo.md")
+            self.assertTrue(first["checks"]["cluster_report.json"]["ok"])
+            self.assertTrue(second["first_divergence"].startswith("bundle.zip:"), second)
+            self.assertTrue(second["checks"]["memo.md"]["ok"])
+            self.assertIn("not a recorded build", third["error"])
+            self.assertIn("not a report object", fourth["error"])
+            self.assertIn("not a report object", fifth["error"])
+
+
+if __name__ == "__main__":
+    unittest.main()
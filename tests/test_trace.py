@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import copy
+import io
+import random
+import unittest
+
+from mwpack import model, schema, trace
+from mwpack.errors import ValidationError
+from tests.test_model import BASE_CONFIG
+
+
+class TraceTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.config = schema.validate_cluster_config(copy.deepcopy(BASE_CONFIG))
+
+    def test_warm_start_matches_cold_solves(self) -> None:
+        rng = random.Random(3)
+        caps = [0.0, 500.0, 5_000_000.0]
+        for _ in range(200):
+            caps.append(max(0.0, caps[-1] + rng.choice([rng.gauss(0, 20_000), rng.uniform(-4e6, 4e6)])))
+
+        for cap, (nodes, p_total_w) in zip(caps, model.max_nodes_trace(self.config, caps)):
+            config = copy.deepcopy(self.config)
+            config["it_cap_w"] = cap
+            expected = model.solve_max_nodes(config)
+            self.assertEqual(nodes, expected["nodes"])
+            self.assertEqual(p_total_w, expected["p_total_w"])
+
+    def test_csv_and_jsonl_streams(self) -> None:
+        csv_rows = trace.iter_caps(io.StringIO("timestamp,it_cap_w\nt0,5000000\nt1,2000000\n"), "csv")
+        jsonl_rows = trace.iter_caps(
+            io.StringIO('{"timestamp": "t0", "it_cap_w": 5000000}\n\n{"timestamp": "t1", "it_cap_w": 2e6}\n'),
+            "jsonl",
+        )
+        from_csv = list(trace.solve_trace(self.config, csv_rows))
+        from_jsonl = list(trace.solve_trace(self.config, jsonl_rows))
+        self.assertEqual(from_csv, from_jsonl)
+        self.assertEqual([r["timestamp"] for r in from_csv], ["t0", "t1"])
+        self.assertEqual(from_csv[0]["nodes"], model.solve_max_nodes(self.config)["nodes"])
+
+    def test_rejects_bad_rows(self) -> None:
+        with self.assertRaises(ValidationError):
+            list(trace.iter_caps(io.StringIO("cap\n1\n"), "csv"))
+        with self.assertRaises(ValidationError):
+            list(trace.iter_caps(io.StringIO('{"it_cap_w": -1}\n'), "jsonl"))
+        for value in ('"inf"', '"nan"', "1e999"):
+            with self.assertRaisesRegex(ValidationError, "line 2: it_cap_w must be a finite number"):
+                list(trace.iter_caps(io.StringIO(f'{{"it_cap_w": 1}}\n{{"it_cap_w": {value}}}\n'), "jsonl"))
+        with self.assertRaises(ValidationError):
+            list(trace.iter_caps(io.StringIO("it_cap_w\ninf\n"), "csv"))
+
+
+if __name__ == "__main__":
+    unittest.main()
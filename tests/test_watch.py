@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import io
+import json
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from mwpack import build, cli, generations, watch
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+class WatchTests(unittest.TestCase):
+    def _assert_detects_change(self, *, use_inotify: bool) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            memo = root / "memo.md"
+            other = root / "config.json"
+            memo.write_text("# memo\n", encoding="utf-8")
+            other.write_text("{}\n", encoding="utf-8")
+
+            changes = watch.iter_changes(
+                [memo, other],
+                interval=0.01,
+                debounce=0.02,
+                use_inotify=use_inotify,
+            )
+            timer = threading.Timer(0.05, lambda: memo.write_text("# memo v2\n", encoding="utf-8"))
+            timer.start()
+            try:
+                changed = next(changes)
+            finally:
+                timer.cancel()
+                changes.close()
+            self.assertEqual(changed, {memo.resolve()})
+
+    def test_polling_detects_change(self) -> None:
+        self._assert_detects_change(use_inotify=False)
+
+    def test_inotify_or_fallback_detects_change(self) -> None:
+        self._assert_detects_change(use_inotify=True)
+
+    def test_snapshot_marks_missing_paths(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            missing = Path(tmp) / "missing.md"
+            self.assertEqual(watch.snapshot([missing]), {missing: None})
+
+    def test_watch_build_reruns_failed_stages(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            memo = root / "memo.md"
+            config = root / "config.json"
+            out = root / "out"
+            memo.write_text("# v1\n", encoding="utf-8")
+            good = (ROOT / "tools" / "example_5mw_config.json").read_text(encoding="utf-8")
+            config.write_text(good, encoding="utf-8")
+
+            def changes(paths: list[Path], **_: float):
+                memo_path, config_path = paths
+                memo.write_text("# v2\n", encoding="utf-8")
+                yield {memo_path}
+                config.write_text("{broken", encoding="utf-8")
+                yield {config_path}
+                # Only the memo changed, but the failed solve must not be
+                # replaced by the last good report.
+                memo.write_text("# v3\n", encoding="utf-8")
+                yield {memo_path}
+                config.write_text(good, encoding="utf-8")
+                yield {config_path}
+
+            args = ["build", "--memo", str(memo), "--config", str(config), "--out", str(out), "--watch"]
+            calls: list[frozenset[str]] = []
+            published: list[str] = []
+            build_artifacts = build.build_artifacts
+
+            def record(*call_args, **kwargs):
+                calls.append(kwargs["stages"])
+                result = build_artifacts(*call_args, **kwargs)
+                published.append((out / "memo.md").read_text(encoding="utf-8"))
+                return result
+
+            with (
+                mock.patch.object(watch, "iter_changes", changes),
+                mock.patch.object(build, "build_artifacts", record),
+                mock.patch.object(generations, "collect_in_background", generations.collect),
+                mock.patch("sys.stdout", new=io.StringIO()),
+                mock.patch("sys.stderr", new=io.StringIO()) as stderr,
+            ):
+                self.assertEqual(cli.run(args), 0)
+
+            self.assertEqual(calls, [build.STAGES, {"normalize"}, {"solve"}, {"normalize"}, {"solve"}])
+            self.assertEqual(published, ["# v1\n", "# v2\n", "# v3\n"])
+            self.assertEqual(stderr.getvalue().count("error:"), 2)
+            report = json.loads((out / "cluster_report.json").read_text(encoding="utf-8"))
+            self.assertIn("it_cap_w", report)
+
+
+if __name__ == "__main__":
+    unittest.main()